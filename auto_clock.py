@@ -22,10 +22,12 @@ class AutoClock():
         self.board = chess.Board()
         self.running = False
 
-        self.serial = serial.Serial(port=self.port, baudrate=9600)
+        self.serial = SerialTransport(self.port)
 
-        self.board_fen = dgt_message_to_fen(get_dgt_board_state(self.serial))
-        self.legal_moves = legal_fens(self.board)
+        self.board_squares = get_dgt_squares(self.serial)
+        self.board_placement = STARTING_PLACEMENT
+        self.searched_squares = None
+        self.opening_cache = open_opening_cache()
         self.white_to_move = True
 
     def ms_to_hh_mm_ss(self, ms):
@@ -53,14 +55,21 @@ class AutoClock():
 
     def run_clock(self):
         current_time = current_milli_time()
-        if self.board_fen in self.legal_moves:
+        moves = None
+        # a placement that explains no moves is only searched once, not on
+        # every tick of the clock
+        if self.board_squares is not None and self.board_squares != self.searched_squares:
+            self.searched_squares = self.board_squares
+            moves = reconcile_moves(self.board, self.board_placement, self.board_squares, cache=self.opening_cache)
+        # moves made between two polls are each charged at the time they
+        # were seen, so only the last mover's clock is started
+        for move in moves or []:
             if not self.running:
                 self.white_start_time = current_time
                 self.black_start_time = current_time
 
-            move = self.legal_moves[self.board_fen]
-            self.board.push_uci(move)
-            self.legal_moves = legal_fens(self.board)
+            self.board.push(move)
+            self.board_placement = self.board_squares
             self.white_to_move = not self.white_to_move
             if self.white_to_move:
                 self.black_time -= (current_time - self.black_start_time)
@@ -104,9 +113,10 @@ class AutoClock():
         }
 
     def run_board(self):
-        s = get_dgt_board_state(self.serial)
-        fen = dgt_message_to_fen(s)
-        self.board_fen = fen
+        squares = get_dgt_squares(self.serial)
+        if squares is None:
+            return
+        self.board_squares = squares
 
     def start_pause_timer(self):
         current_time = current_milli_time()
@@ -0,0 +1,61 @@
+import argparse
+import sys, os, time
+import chess
+from utils import *
+
+def opening_records(plies):
+    """ Every (parent key, child key, child placement hash, move) of the first `plies` plies, each position expanded once. """
+    records = []
+    frontier = [chess.Board()]
+    seen = {chess.polyglot.zobrist_hash(frontier[0])}
+    for ply in range(plies):
+        next_frontier = []
+        for board in frontier:
+            key = chess.polyglot.zobrist_hash(board)
+            for move in board.legal_moves:
+                child = board.copy(stack=False)
+                child.push(move)
+                child_key = chess.polyglot.zobrist_hash(child)
+                records.append((key, child_key, placement_hash(placement_from_board(child)), encode_move(move)))
+                if child_key not in seen:
+                    seen.add(child_key)
+                    next_frontier.append(child)
+        frontier = next_frontier
+        print('ply ' + str(ply + 1) + ': ' + str(len(records)) + ' moves, ' + str(len(seen)) + ' positions')
+    records.sort()
+    return records
+
+def write_opening_cache(filename, plies, records):
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as file:
+        file.write(OPENING_CACHE_HEADER.pack(OPENING_CACHE_MAGIC, plies, len(records)))
+        for record in records:
+            file.write(OPENING_CACHE_RECORD.pack(*record))
+    os.replace(temp_filename, filename)
+
+def default_argument_parser(for_name: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(for_name, description="Precompute the opening placement cache used to recognize moves early in a game")
+    parser.add_argument("--plies", type=int, default=4, help="Number of plies from the starting position to cover")
+    parser.add_argument("--output", type=str, default=OPENING_CACHE_FILE, help="File to write the cache to")
+    return parser
+
+def main():
+    parser = default_argument_parser("build_opening_cache")
+    args = parser.parse_args()
+
+    start_time = time.monotonic()
+    records = opening_records(args.plies)
+    write_opening_cache(args.output, args.plies, records)
+    size = len(records) * OPENING_CACHE_RECORD.size + OPENING_CACHE_HEADER.size
+    print('wrote ' + str(len(records)) + ' moves (' + str(size // 1024) + ' kB) to ' + args.output
+          + ' in ' + '{:.1f}'.format(time.monotonic() - start_time) + 's')
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('Interrupted')
+        try:
+            sys.exit(130)
+        except SystemExit:
+            os._exit(130)
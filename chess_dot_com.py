@@ -8,6 +8,7 @@ import chess
 import pickle
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 
 from utils import *
@@ -24,7 +25,7 @@ class GameState(enum.Enum):
     DETECT_COLOR = 5
 
 class Game():
-    def __init__(self, port, url, fullscreen, starting_fen, use_board_state, analysis, use_game, color, debug):
+    def __init__(self, port, url, fullscreen, starting_fen, use_board_state, analysis, use_game, color, debug, book=None):
         self.port = port
         self.debug = debug
         self.url = url
@@ -35,6 +36,7 @@ class Game():
         self.saved_game_filename = None
         self.analysis = analysis
         self.color = color
+        self.book_filename = book
         self.driver = None
         self.init_game()
 
@@ -42,6 +44,8 @@ class Game():
         result = ''
 
         result += 'Game State: ' + str(self.state)
+        result += '\n' + str(move_index_lru)
+        result += '\nOpening: ' + self.opening_label()
         result += '\nGame Fen: '
         result += self.board.fen()
 
@@ -52,7 +56,7 @@ class Game():
             pass
 
         try:
-            dgt_fen = get_dgt_board_state(self.serial)
+            dgt_fen = dgt_squares_to_fen(get_dgt_squares(self.serial))
             result += '\nDGT Fen: ' + dgt_fen
         except Exception:
             pass
@@ -64,7 +68,10 @@ class Game():
         logging.basicConfig(filename=log_filename, filemode='w', level=logging.INFO)
 
         self.board_reset_msg_sent = False
-        self.serial = serial.Serial(port=self.port, baudrate=9600)
+        self.serial = SerialTransport(self.port)
+        self.move_index = MoveIndexCache()
+        self.opening_cache = open_opening_cache()
+        self.book = open_opening_book(self.book_filename)
 
         if(self.use_board_state):
             self.set_fen_to_last_ee_game()
@@ -143,7 +150,13 @@ class Game():
             file.write(time.strftime("%Y-%m-%d_%H.%M.%S\n"))
 
         self.board = chess.Board(starting_fen)
-        self.legal_moves = legal_fens(self.board)
+        self.placement = placement_from_board(self.board)
+        self.history = PlacementHistory(self.placement)
+        self.resync = BoardResync(self.move_index.get)
+        self.searched_squares = None
+        self.book_replies = []
+        self.book_plies = 0
+        self.prefetch()
         self.set_state(state)
 
     def debug_print(self, text):
@@ -155,6 +168,26 @@ class Game():
     def close(self):
         if self.serial.is_open:
             self.serial.close()
+        self.move_index.close()
+        if self.book is not None:
+            self.book.close()
+
+    def prefetch(self):
+        """ Start indexing the game position and its book replies. """
+        in_book = len(self.book_replies) > 0
+        self.book_replies = book_replies(self.book, self.board)
+        if self.book_replies:
+            self.book_plies = len(self.board.move_stack)
+        elif in_book:
+            self.debug_print('Left the opening book: ' + self.opening_label())
+        self.move_index.prefetch(self.board, likely=[move for move, weight in self.book_replies])
+
+    def opening_label(self):
+        if self.book is None:
+            return 'no book'
+        if self.book_replies:
+            return 'in book, ' + describe_book_replies(self.board, self.book_replies)
+        return 'out of book after ' + str(self.book_plies) + ' plies'
 
     def set_state(self, state):
         if state == None:
@@ -174,19 +207,62 @@ class Game():
 
     def make_move(self, uci_move):
         self.board.push_uci(uci_move)
+        self.placement = placement_from_board(self.board)
+        self.history.push(self.placement)
+        self.searched_squares = None
+        self.prefetch()
         with open(self.saved_game_filename, 'a') as file:
             file.write(uci_move + '\n')
+
+    def report_misplaced(self, squares):
+        result = self.resync.check(self.board, self.placement, squares)
+        if result is None:
+            return
+        move, target, misplaced = result
+        if move is None:
+            print('Board does not match the game: ' + describe_misplaced(target, squares, misplaced))
+        else:
+            print('Board does not match the game or ' + move.uci() + ': ' + describe_misplaced(target, squares, misplaced))
+
+    def reconcile(self, squares):
+        """
+        reconcile_moves from the game position to `squares`. A placement that
+        explains no moves is only searched once, not on every poll.
+        """
+        if squares == self.searched_squares:
+            return None
+        self.searched_squares = squares
+        return reconcile_moves(self.board, self.placement, squares, cache=self.opening_cache)
+
+    def take_back(self, ply):
+        count = len(self.history) - 1 - ply
+        for _ in range(count):
+            self.board.pop()
+        self.history.rewind(ply)
+        self.placement = self.history.current
+        self.searched_squares = None
+        self.prefetch()
+        with open(self.saved_game_filename) as file:
+            header = file.readline()
+        with open(self.saved_game_filename, 'w') as file:
+            file.write(header)
+            for move in self.board.move_stack:
+                file.write(move.uci() + '\n')
+        # the analysis board steps back through its move list with the left arrow
+        self.driver.find_element(By.CSS_SELECTOR, "body").send_keys(Keys.LEFT * count)
+        self.debug_print('Took back ' + str(count) + ' moves')
     
     def state_pre_game(self):
-        s = get_dgt_board_state(self.serial)
-        fen = dgt_message_to_fen(s)
-        game_fen = fen_from_board(self.board)
+        squares = get_dgt_squares(self.serial)
+        if squares is None:
+            return
         if not self.logged_this_state:
-            self.debug_print("DGT FEN: " + fen)
-        if fen != game_fen:
+            self.debug_print("DGT FEN: " + dgt_squares_to_fen(squares))
+        if squares != self.placement:
             if not self.board_reset_msg_sent:
                 self.board_reset_msg_sent = True
                 print('Waiting for board to be reset...')
+            self.report_misplaced(squares)
             return
         
         if self.color == 'detect':
@@ -206,14 +282,15 @@ class Game():
             self.set_state(GameState.OPPONENT_TURN)
 
     def state_detect_color(self):
-        s = get_dgt_board_state(self.serial)
-        dgt_fen = dgt_message_to_fen(s)
-        if dgt_fen in self.legal_moves:
+        squares = get_dgt_squares(self.serial)
+        if squares is None:
+            return
+        if recognize_move(self.board, self.placement, squares) is not None:
             self.is_white = True
             self.set_state(GameState.PLAYER_TURN)
             return
-        browser_fen = get_fen_from_browser(self.driver)
-        if browser_fen in self.legal_moves:
+        browser_squares = get_squares_from_browser(self.driver)
+        if recognize_move(self.board, self.placement, browser_squares) is not None:
             self.is_white = False
             self.set_state(GameState.OPPONENT_TURN)
 
@@ -228,42 +305,63 @@ class Game():
             self.set_state(GameState.OPPONENT_TURN)
 
     def state_player_turn(self):
-        s = get_dgt_board_state(self.serial)
-        fen = dgt_message_to_fen(s)
+        squares = get_dgt_squares(self.serial)
+        if squares is None:
+            return
         if not self.logged_this_state:
-            self.debug_print("DGT FEN: " + fen)
+            self.debug_print("DGT FEN: " + dgt_squares_to_fen(squares))
             self.debug_print("Internal State FEN: " + self.board.fen())
-        if fen in self.legal_moves:
-            move = self.legal_moves[fen]
-            self.make_move(move)
-            self.legal_moves = legal_fens(self.board)
-            make_uci_move(self.driver, move, self.is_white)
+        move = recognize_move(self.board, self.placement, squares)
+        moves = [move] if move is not None else None
+        if moves is None and self.analysis:
+            # both sides are moved on the board, so it may have been taken
+            # back to an earlier position or several moves may have landed
+            # between two reads
+            ply = self.history.ply_of(squares)
+            if ply is not None and ply < len(self.history) - 1:
+                self.take_back(ply)
+                return
+            moves = self.reconcile(squares)
+        if moves is None:
+            self.report_misplaced(squares)
+        else:
+            for move in moves:
+                move = move.uci()
+                self.make_move(move)
+                make_uci_move(self.driver, move, self.is_white)
             self.set_state(GameState.OPPONENT_TURN)
             if(self.board.is_checkmate()):
                 self.reset_game(FULL_STARTING_FEN)
 
     def state_opponent_turn(self):
-        fen = get_fen_from_browser(self.driver)
+        squares = get_squares_from_browser(self.driver)
         if self.state_iterations == 0:
-            self.debug_print("Browser FEN: " + fen)
-        if fen in self.legal_moves:
-            move = self.legal_moves[fen]
-            self.make_move(move)
-            self.legal_moves = legal_fens(self.board)
+            self.debug_print("Browser FEN: " + dgt_squares_to_fen(squares))
+        moves = self.reconcile(squares)
+        if moves is not None:
+            for move in moves:
+                self.make_move(move.uci())
             self.set_state(GameState.WAIT_PLAYER_UPDATE_OPPONENT)
             if(self.board.is_checkmate()):
                 self.reset_game(FULL_STARTING_FEN)
         
     def state_wait_player_update_opponent(self):
-        s = get_dgt_board_state(self.serial)
-        board_fen = dgt_message_to_fen(s)
-        game_fen = fen_from_board(self.board)
+        squares = get_dgt_squares(self.serial)
+        if squares is None:
+            return
         if not self.logged_this_state:
-            self.debug_print("DGT FEN: " + board_fen)
+            self.debug_print("DGT FEN: " + dgt_squares_to_fen(squares))
             self.debug_print("Internal State FEN: " + self.board.fen())
             
-        if board_fen == game_fen:
+        player_to_move = is_white_to_move(self.board) == self.is_white
+        if squares == self.placement:
+            self.set_state(GameState.PLAYER_TURN if player_to_move else GameState.OPPONENT_TURN)
+        elif player_to_move and recognize_move(self.board, self.placement, squares) is not None:
+            # the opponent's move was copied and the reply already made
+            # between two reads
             self.set_state(GameState.PLAYER_TURN)
+        else:
+            self.report_misplaced(squares)
 
     def run(self):
         if self.state == GameState.PRE_GAME:
@@ -295,6 +393,7 @@ def default_argument_parser(for_name: str) -> argparse.ArgumentParser:
     parser.add_argument('--analysis', action=argparse.BooleanOptionalAction, help="Play in analysis mode")
     parser.add_argument("--color", type=str, help="Color of the pieces. If not specified, will ask through stdio.")
     parser.add_argument('--debug', action=argparse.BooleanOptionalAction, help="Print debug text to console")
+    parser.add_argument("--book", type=str, help="Polyglot opening book (.bin) used to prefetch likely replies and label the opening")
     return parser
 
 def main():
@@ -309,7 +408,8 @@ def main():
     analysis = args.analysis
     fullscreen = args.fullscreen
     color = args.color
-    game = Game(port, url, fullscreen, fen, use_board_state, analysis, use_game, color, debug)
+    book = args.book
+    game = Game(port, url, fullscreen, fen, use_board_state, analysis, use_game, color, debug, book)
 
     try:
         while True:
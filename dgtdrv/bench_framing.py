@@ -0,0 +1,141 @@
+import argparse
+import array
+import random
+import time
+
+from dgt_constants import DgtConstants
+from dgt_driver import DgtDriver
+
+class LegacyDgtDriver(DgtDriver):
+    """
+    The framing DgtDriver used before the read cursor was introduced: input is
+    copied into a signed array, every payload is sliced out and the remainder
+    is shifted to the front after each frame. Kept only as a baseline.
+    """
+    def __init__(self, read, write):
+        super().__init__(read, write)
+        self.buffer = array.array('b', [0] * 128)
+        self.position = 0
+
+    def got_bytes(self, bytes):
+        if self.position + len(bytes) > len(self.buffer):
+            self.buffer = array.array('b', self.buffer) + array.array('b', [0] * len(bytes))
+        self.buffer[self.position:self.position + len(bytes)] = array.array('b', bytes)
+        self.position += len(bytes)
+        self.try_emit_message()
+        if len(self.buffer) > 128 and self.position < 128:
+            self.buffer = array.array('b', self.buffer[:128])
+
+    def try_emit_message(self):
+        while self.position >= 3:
+            message = self.buffer[0]
+            sizeMsb = self.buffer[1]
+            sizeLsb = self.buffer[2]
+            if (message & 0x80) == 0:
+                self.scroll_bad_bytes(1)
+                continue
+            if (sizeMsb & 0x80) != 0:
+                self.scroll_bad_bytes(2)
+                continue
+            if (sizeLsb & 0x80) != 0:
+                self.scroll_bad_bytes(3)
+                continue
+            messageLen = (sizeMsb << 7) | sizeLsb
+            if messageLen > self.position:
+                return
+            msg = None
+            try:
+                data = self.buffer[3:messageLen] if messageLen > 3 else []
+                self.buffer[:self.position - messageLen] = self.buffer[messageLen:self.position]
+                self.position -= messageLen
+                msg = self.decode_message(message & 0x7f, data)
+            except Exception as e:
+                continue
+            if msg is not None:
+                self.readCallback(msg)
+
+    def scroll_bad_bytes(self, start):
+        good = start
+        while good < self.position:
+            if (self.buffer[good] & 0x80) != 0:
+                break
+            good += 1
+        self.buffer[:self.position - good] = self.buffer[good:self.position]
+        self.position -= good
+
+class FramingOnly:
+    """ Mixin that drops every payload, leaving only the cost of framing. """
+    def decode_message(self, message, data):
+        return None
+
+class LegacyFramingOnly(FramingOnly, LegacyDgtDriver):
+    pass
+
+class DgtDriverFramingOnly(FramingOnly, DgtDriver):
+    pass
+
+def frame(message, payload):
+    length = len(payload) + 3
+    return bytes([0x80 | message, (length >> 7) & 0x7f, length & 0x7f]) + bytes(payload)
+
+def field_updates(count, rng):
+    return b''.join(frame(DgtConstants.DGT_FIELD_UPDATE, [rng.randrange(64), rng.randrange(13)]) for _ in range(count))
+
+def board_dumps(count, rng):
+    return b''.join(frame(DgtConstants.DGT_BOARD_DUMP, [rng.randrange(13) for _ in range(64)]) for _ in range(count))
+
+def ee_moves(size, rng):
+    # Field events only: a piece code in 0x40-0x4c followed by a square.
+    payload = []
+    while len(payload) + 2 <= size:
+        payload += [0x40 | rng.randrange(13), rng.randrange(64)]
+    return frame(DgtConstants.DGT_EE_MOVES, payload)
+
+def throughput(driver_class, stream, chunk_size, repeat):
+    best = None
+    for _ in range(repeat):
+        count = [0]
+        def got_message(msg):
+            count[0] += 1
+        driver = driver_class(got_message, lambda data: None)
+        begin = time.perf_counter()
+        for i in range(0, len(stream), chunk_size):
+            driver.got_bytes(stream[i:i + chunk_size])
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+    return len(stream) / best, count[0]
+
+def default_argument_parser(for_name: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(for_name, description="Compare DgtDriver framing throughput on synthetic streams")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic streams")
+    return parser
+
+def main():
+    parser = default_argument_parser("bench_framing")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    cases = [
+        ("field updates, one 100 kB read", field_updates(20000, rng), 1 << 20),
+        ("field updates, 32 byte reads", field_updates(20000, rng), 32),
+        ("board dumps, one 67 kB read", board_dumps(1000, rng), 1 << 20),
+        ("EE_MOVES 16 kB frame, one read", ee_moves(16000, rng), 1 << 20),
+        ("EE_MOVES 16 kB frame, 64 byte reads", ee_moves(16000, rng), 64),
+    ]
+    drivers = [
+        ("framing only", LegacyFramingOnly, DgtDriverFramingOnly),
+        ("framing and decoding", LegacyDgtDriver, DgtDriver),
+    ]
+
+    for title, legacy, current in drivers:
+        print(f"{title:40} {'before':>12} {'after':>12} {'speedup':>8}")
+        for name, stream, chunk_size in cases:
+            before, before_count = throughput(legacy, stream, chunk_size, args.repeat)
+            after, after_count = throughput(current, stream, chunk_size, args.repeat)
+            assert before_count == after_count, f"{name}: {before_count} != {after_count} messages"
+            print(f"  {name:38} {before / 1e6:7.3f} MB/s {after / 1e6:7.3f} MB/s {after / before:7.1f}x")
+        print()
+
+if __name__ == "__main__":
+    main()
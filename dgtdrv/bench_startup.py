@@ -0,0 +1,66 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bitboard import Bitboard
+
+def legacy_between_rays():
+    """
+    The BETWEEN/RAYS loop as it used to run: nested inside the per-square
+    loop, so the whole 64x64 pass was repeated for every square.
+    """
+    for sq in range(64):
+        for a in range(64):
+            for b in range(64):
+                if Bitboard.contains(Bitboard.sliding_attacks(a, 0, Bitboard.ROOK_DELTAS), b):
+                    Bitboard.sliding_attacks(a, 1 << b, Bitboard.ROOK_DELTAS) & Bitboard.sliding_attacks(b, 1 << a, Bitboard.ROOK_DELTAS)
+                elif Bitboard.contains(Bitboard.sliding_attacks(a, 0, Bitboard.BISHOP_DELTAS), b):
+                    Bitboard.sliding_attacks(a, 1 << b, Bitboard.BISHOP_DELTAS) & Bitboard.sliding_attacks(b, 1 << a, Bitboard.BISHOP_DELTAS)
+
+def best_of(repeat, function):
+    best = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def import_time():
+    """ Seconds for a fresh interpreter to import bitboard, which loads Bitboard.CACHE_FILE. """
+    code = "import time; begin = time.perf_counter(); import bitboard; print(time.perf_counter() - begin)"
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c', code], cwd=here, capture_output=True, text=True, check=True)
+    return float(output.stdout)
+
+def default_argument_parser(for_name: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(for_name, description="Measure Bitboard table generation and cache loading")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the fastest is reported")
+    parser.add_argument("--legacy", action=argparse.BooleanOptionalAction, help="Also time the old nested BETWEEN/RAYS loop (slow)")
+    return parser
+
+def main():
+    parser = default_argument_parser("bench_startup")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        cache_file = os.path.join(folder, 'bitboard_tables.bin')
+        generate = best_of(args.repeat, Bitboard.generate_tables)
+        save = best_of(args.repeat, lambda: Bitboard.save_tables(cache_file))
+        load = best_of(args.repeat, lambda: Bitboard.load_tables(cache_file))
+        cache_size = os.path.getsize(cache_file)
+        warm_import = min(import_time() for _ in range(args.repeat))
+
+    print(f"{'generate tables':32} {generate * 1000:9.1f} ms")
+    print(f"{'write cache':32} {save * 1000:9.1f} ms ({cache_size // 1024} kB)")
+    print(f"{'load cache':32} {load * 1000:9.1f} ms")
+    print(f"{'import bitboard with cache':32} {warm_import * 1000:9.1f} ms")
+    if args.legacy:
+        legacy = best_of(1, legacy_between_rays)
+        print(f"{'old nested BETWEEN/RAYS loop':32} {legacy * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 
-import ctypes
+import array, os, struct, sys, zlib
 from magic import Magic
 
 class Bitboard:
@@ -26,25 +26,13 @@ class Bitboard:
     # Large overlapping attack table indexed using magic multiplication.
     ATTACKS = [0] * 88772
 
-    def __init__(self):
-        for sq in range(64):
-            self.KNIGHT_ATTACKS[sq] = self.sliding_attacks(sq, self.ALL, self.KNIGHT_DELTAS)
-            self.KING_ATTACKS[sq] = self.sliding_attacks(sq, self.ALL, self.KING_DELTAS)
-            self.WHITE_PAWN_ATTACKS[sq] = self.sliding_attacks(sq, self.ALL, self.WHITE_PAWN_DELTAS)
-            self.BLACK_PAWN_ATTACKS[sq] = self.sliding_attacks(sq, self.ALL, self.BLACK_PAWN_DELTAS)
-
-            self.init_magics(sq, Magic.ROOK[sq], 12, self.ROOK_DELTAS)
-            self.init_magics(sq, Magic.BISHOP[sq], 9, self.BISHOP_DELTAS)
-
-            for a in range(64):
-                for b in range(64):
-                    if self.contains(self.sliding_attacks(a, 0, self.ROOK_DELTAS), b):
-                        self.BETWEEN[a][b] = self.sliding_attacks(a, 1 << b, self.ROOK_DELTAS) & self.sliding_attacks(b, 1 << a, self.ROOK_DELTAS)
-                        self.RAYS[a][b] = (1 << a) | (1 << b) | self.sliding_attacks(a, 0, self.ROOK_DELTAS) & self.sliding_attacks(b, 0, self.ROOK_DELTAS)
-                    elif self.contains(self.sliding_attacks(a, 0, self.BISHOP_DELTAS), b):
-                        self.BETWEEN[a][b] = self.sliding_attacks(a, 1 << b, self.BISHOP_DELTAS) & self.sliding_attacks(b, 1 << a, self.BISHOP_DELTAS)
-                        self.RAYS[a][b] = (1 << a) | (1 << b) | self.sliding_attacks(a, 0, self.BISHOP_DELTAS) & self.sliding_attacks(b, 0, self.BISHOP_DELTAS)
-    
+    # The generated tables are cached here, next to this file.
+    CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bitboard_tables.bin')
+    # magic, table version, entry count, crc32 of the entries
+    CACHE_HEADER = struct.Struct('<8sIII')
+    CACHE_MAGIC = b'DGTBBT\0\0'
+    CACHE_VERSION = 1
+
     def square_distance(a, b):
         return max(abs(a // 8 - b // 8), abs(a % 8 - b % 8))
 
@@ -66,7 +54,7 @@ class Bitboard:
         subset = 0
         while True:
             attack = Bitboard.sliding_attacks(square, subset, deltas)
-            idx = (int)((magic.factor * (subset & magic.mask)) >> (64 - shift)) + magic.offset
+            idx = (((magic.factor * (subset & magic.mask)) & 0xffffffffffffffff) >> (64 - shift)) + magic.offset
             assert Bitboard.ATTACKS[idx] == 0 or Bitboard.ATTACKS[idx] == attack
             Bitboard.ATTACKS[idx] = attack
 
@@ -75,13 +63,120 @@ class Bitboard:
             if subset == 0:
                 break
 
+    def generate_tables():
+        """ Build every table from scratch. Slow: only done when there is no valid cache. """
+        for i in range(8):
+            Bitboard.RANKS[i] = 0xff << (i * 8)
+            Bitboard.FILES[i] = 0x0101010101010101 << i
+
+        for sq in range(64):
+            Bitboard.KNIGHT_ATTACKS[sq] = Bitboard.sliding_attacks(sq, Bitboard.ALL, Bitboard.KNIGHT_DELTAS)
+            Bitboard.KING_ATTACKS[sq] = Bitboard.sliding_attacks(sq, Bitboard.ALL, Bitboard.KING_DELTAS)
+            Bitboard.WHITE_PAWN_ATTACKS[sq] = Bitboard.sliding_attacks(sq, Bitboard.ALL, Bitboard.WHITE_PAWN_DELTAS)
+            Bitboard.BLACK_PAWN_ATTACKS[sq] = Bitboard.sliding_attacks(sq, Bitboard.ALL, Bitboard.BLACK_PAWN_DELTAS)
+
+            Bitboard.init_magics(sq, Magic.ROOK[sq], 12, Bitboard.ROOK_DELTAS)
+            Bitboard.init_magics(sq, Magic.BISHOP[sq], 9, Bitboard.BISHOP_DELTAS)
+
+        for a in range(64):
+            rook_attacks = Bitboard.sliding_attacks(a, 0, Bitboard.ROOK_DELTAS)
+            bishop_attacks = Bitboard.sliding_attacks(a, 0, Bitboard.BISHOP_DELTAS)
+            for b in range(64):
+                if Bitboard.contains(rook_attacks, b):
+                    deltas = Bitboard.ROOK_DELTAS
+                elif Bitboard.contains(bishop_attacks, b):
+                    deltas = Bitboard.BISHOP_DELTAS
+                else:
+                    continue
+                Bitboard.BETWEEN[a][b] = Bitboard.sliding_attacks(a, 1 << b, deltas) & Bitboard.sliding_attacks(b, 1 << a, deltas)
+                Bitboard.RAYS[a][b] = (1 << a) | (1 << b) | Bitboard.sliding_attacks(a, 0, deltas) & Bitboard.sliding_attacks(b, 0, deltas)
+
+    def table_entries():
+        """ Every table flattened into one sequence of unsigned 64 bit entries, in a fixed order. """
+        entries = array.array('Q')
+        for table in (Bitboard.RANKS, Bitboard.FILES, Bitboard.KNIGHT_ATTACKS, Bitboard.KING_ATTACKS,
+                      Bitboard.WHITE_PAWN_ATTACKS, Bitboard.BLACK_PAWN_ATTACKS, Bitboard.ATTACKS):
+            entries.extend(table)
+        for table in (Bitboard.BETWEEN, Bitboard.RAYS):
+            for row in table:
+                entries.extend(row)
+        return entries
+
+    def set_table_entries(entries):
+        """ The inverse of table_entries. """
+        position = 0
+        def take(count):
+            nonlocal position
+            values = entries[position:position + count].tolist()
+            position += count
+            return values
+        Bitboard.RANKS = take(8)
+        Bitboard.FILES = take(8)
+        Bitboard.KNIGHT_ATTACKS = take(64)
+        Bitboard.KING_ATTACKS = take(64)
+        Bitboard.WHITE_PAWN_ATTACKS = take(64)
+        Bitboard.BLACK_PAWN_ATTACKS = take(64)
+        Bitboard.ATTACKS = take(len(Bitboard.ATTACKS))
+        Bitboard.BETWEEN = [take(64) for _ in range(64)]
+        Bitboard.RAYS = [take(64) for _ in range(64)]
+
+    def table_entry_count():
+        return 8 + 8 + 4 * 64 + len(Bitboard.ATTACKS) + 2 * 64 * 64
+
+    def load_tables(filename):
+        """ Fill the tables from a cache file. Returns False if it is missing, stale or corrupt. """
+        try:
+            with open(filename, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return False
+        if len(data) < Bitboard.CACHE_HEADER.size:
+            return False
+        magic, version, count, checksum = Bitboard.CACHE_HEADER.unpack_from(data)
+        payload = memoryview(data)[Bitboard.CACHE_HEADER.size:]
+        if (magic != Bitboard.CACHE_MAGIC or version != Bitboard.CACHE_VERSION or count != Bitboard.table_entry_count()
+                or len(payload) != count * 8 or zlib.crc32(payload) != checksum):
+            return False
+        entries = array.array('Q')
+        entries.frombytes(payload)
+        if sys.byteorder != 'little':
+            entries.byteswap() # the cache is little-endian
+        Bitboard.set_table_entries(entries)
+        return True
+
+    def save_tables(filename):
+        entries = Bitboard.table_entries()
+        if sys.byteorder != 'little':
+            entries.byteswap()
+        payload = entries.tobytes()
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'wb') as file:
+            file.write(Bitboard.CACHE_HEADER.pack(Bitboard.CACHE_MAGIC, Bitboard.CACHE_VERSION, len(entries), zlib.crc32(payload)))
+            file.write(payload)
+        os.replace(temp_filename, filename)
+
+    def init_tables(filename=None):
+        """
+        Load the tables from the cache file, or generate them once and write
+        the cache for the next start. An unwritable location only costs the
+        next start another generation.
+        """
+        filename = filename or Bitboard.CACHE_FILE
+        if Bitboard.load_tables(filename):
+            return
+        Bitboard.generate_tables()
+        try:
+            Bitboard.save_tables(filename)
+        except OSError:
+            pass
+
     def bishop_attacks(square, occupied):
         magic = Magic.BISHOP[square]
-        return Bitboard.ATTACKS[(int)((magic.factor * (occupied & magic.mask)) >> (64 - 9)) + magic.offset]
+        return Bitboard.ATTACKS[(((magic.factor * (occupied & magic.mask)) & 0xffffffffffffffff) >> (64 - 9)) + magic.offset]
 
     def rook_attacks(square, occupied):
         magic = Magic.ROOK[square]
-        return Bitboard.ATTACKS[(int)((magic.factor * (occupied & magic.mask)) >> (64 - 12)) + magic.offset]
+        return Bitboard.ATTACKS[(((magic.factor * (occupied & magic.mask)) & 0xffffffffffffffff) >> (64 - 12)) + magic.offset]
 
     def queen_attacks(square, occupied):
         return Bitboard.bishop_attacks(square, occupied) ^ Bitboard.rook_attacks(square, occupied)
@@ -91,11 +186,11 @@ class Bitboard:
 
     def lsb(b):
         assert b != 0
-        return ctypes.c_int64(b & -b).bit_length() - 1
+        return (b & -b).bit_length() - 1
 
     def msb(b):
         assert b != 0
-        return 63 - ctypes.c_int64(b).bit_length()
+        return (b & 0xffffffffffffffff).bit_length() - 1
 
     def more_than_one(b):
         return (b & (b - 1)) != 0
@@ -124,3 +219,5 @@ class Bitboard:
         x = ((x >> 16) & v2) | ((x & v2) << 16)
         x = (x >> 32)       | (x       << 32)
         return x
+
+Bitboard.init_tables()
@@ -1,5 +1,5 @@
 from bitboard import Bitboard
-from zobrist_hash import ZobristHash
+from zobrist_hash import ZobristHash, POLYGLOT
 from piece import Piece
 from move import Move
 from role import Role
@@ -8,41 +8,8 @@ from move_list import MoveList
 from result import Result
 
 class Board:
-    def __init__(self):
-        self.pawns = 0xff00000000ff00
-        self.knights = 0x4200000000000042
-        self.bishops = 0x2400000000000024
-        self.rooks = 0x8100000000000081
-        self.queens = 0x800000000000008
-        self.kings = 0x1000000000000010
-
-        self.white = 0xffff
-        self.black = 0xffff000000000000
-        self.occupied = 0xffff00000000ffff
-
-        self.turn = True
-        self.epSquare = 0
-        self.castlingRights = self.rooks
-
-        self.incrementalHash = ZobristHash.hashPieces(self) ^ ZobristHash.hashTurn(self)
-
-    def __init__(self, board):
-        self.pawns = board.pawns
-        self.knights = board.knights
-        self.bishops = board.bishops
-        self.rooks = board.rooks
-        self.queens = board.queens
-        self.kings = board.kings
-
-        self.white = board.white
-        self.black = board.black
-        self.occupied = board.occupied
-
-        self.turn = board.turn
-        self.epSquare = board.epSquare
-        self.castlingRights = board.castlingRights
-
-        self.incrementalHash = ZobristHash.hashPieces(self) ^ ZobristHash.hashTurn(self)
+    __slots__ = ('pawns', 'knights', 'bishops', 'rooks', 'queens', 'kings', 'white', 'black', 'occupied',
+                 'turn', 'epSquare', 'castlingRights', 'incrementalHash', 'undo')
 
     def __init__(self, pawns, knights, bishops, rooks, queens, kings, white, black, turn, epSquare, castlingRights):
         self.pawns = pawns
@@ -60,12 +27,78 @@ class Board:
         self.epSquare = epSquare
         self.castlingRights = castlingRights
 
-        self.incrementalHash = ZobristHash.hashPieces(self) ^ ZobristHash.hashTurn(self)
+        self.rehash()
+
+        # One (move, captured role, castling rights, ep square, incremental
+        # hash) record per push(), so pop() can restore the board in place.
+        self.undo = []
 
     @staticmethod
     def emptyBoard():
         return Board(0, 0, 0, 0, 0, 0, 0, 0, True, 0, 0)
 
+    @staticmethod
+    def standard():
+        return Board(0xff00000000ff00, 0x4200000000000042, 0x2400000000000024, 0x8100000000000081,
+                     0x800000000000008, 0x1000000000000010, 0xffff, 0xffff000000000000, True, 0, 0x8100000000000081)
+
+    @staticmethod
+    def fromFen(fen):
+        """ Board from the first four fields of a FEN; castling rights are KQkq style. """
+        fields = fen.split()
+        board = Board.emptyBoard()
+        for rank, row in enumerate(reversed(fields[0].split('/'))):
+            file = 0
+            for c in row:
+                if c.isdigit():
+                    file += int(c)
+                    continue
+                role = next(role for role in Role if role.symbol == (c.upper() if c.upper() != 'P' else ''))
+                board.put(Square.square(file, rank), c.isupper(), role)
+                file += 1
+        board.turn = len(fields) < 2 or fields[1] == 'w'
+        if len(fields) > 2:
+            for c, square in (('K', Square.H1), ('Q', Square.A1), ('k', Square.H8), ('q', Square.A8)):
+                if c in fields[2]:
+                    board.castlingRights |= 1 << square
+        if len(fields) > 3 and fields[3] != '-':
+            board.epSquare = Square.square(ord(fields[3][0]) - ord('a'), int(fields[3][1]) - 1)
+        board.rehash()
+        return board
+
+    def copy(self):
+        # Bypasses __init__ so the hash is copied rather than recomputed.
+        board = Board.__new__(Board)
+        board.pawns = self.pawns
+        board.knights = self.knights
+        board.bishops = self.bishops
+        board.rooks = self.rooks
+        board.queens = self.queens
+        board.kings = self.kings
+        board.white = self.white
+        board.black = self.black
+        board.occupied = self.occupied
+        board.turn = self.turn
+        board.epSquare = self.epSquare
+        board.castlingRights = self.castlingRights
+        board.incrementalHash = self.incrementalHash
+        board.undo = []
+        return board
+
+    def rehash(self):
+        """
+        Recompute incrementalHash from scratch. epSquare is only kept when a
+        pawn can capture en passant, so that it alone decides whether the en
+        passant key is part of the hash.
+        """
+        if ZobristHash.hashEnPassant(self) == 0:
+            self.epSquare = 0
+        self.incrementalHash = ZobristHash.hashBoard(self)
+
+    def checkHash(self):
+        if self.incrementalHash != ZobristHash.hashBoard(self):
+            raise AssertionError(f"incremental hash {self.incrementalHash:x} != {ZobristHash.hashBoard(self):x}\n{self.debugBoard()}")
+
     def isOccupied(self, square):
         return Bitboard.contains(self.occupied, square)
 
@@ -142,7 +175,12 @@ class Board:
         return Bitboard.contains(self.white, square)
 
     def zobristHash(self):
-        return self.incrementalHash ^ ZobristHash.hashCastling(self) ^ ZobristHash.hashEnPassant(self)
+        return self.incrementalHash
+
+    def placementHash(self):
+        """ Zobrist key of the pieces alone, for matching a physical board that cannot show turn or castling rights. """
+        return (self.incrementalHash ^ ZobristHash.hashTurn(self) ^ ZobristHash.hashCastlingRights(self.castlingRights)
+                ^ ZobristHash.hashEpSquare(self.epSquare))
 
     def pieceMap(self):
         map = {}
@@ -153,15 +191,21 @@ class Board:
             occupied &= occupied - 1
         return map
 
+    # Set to check incrementalHash against ZobristHash.hashBoard after every
+    # play(); far too slow for anything but debugging.
+    debugHash = False
+
     def play(self, move):
+        castlingRights = self.castlingRights
+        self.incrementalHash ^= ZobristHash.hashEpSquare(self.epSquare)
         self.epSquare = 0
 
         if move.type == Move.NORMAL:
-            if move.role == Role.PAWN and abs(move.from_square_square - move.to) == 16:
+            if move.role == Role.PAWN and abs(move.from_square - move.to) == 16:
                 theirPawns = self.them() & self.pawns
                 if theirPawns != 0:
                     sq = move.from_square + (8 if self.turn else -8)
-                    if Bitboard.pawnAttacks(self.turn, sq) & theirPawns != 0:
+                    if Bitboard.pawn_attacks(self.turn, sq) & theirPawns != 0:
                         self.epSquare = sq
 
             if self.castlingRights != 0:
@@ -189,7 +233,55 @@ class Board:
             self.put(move.to, self.turn, Role.PAWN)
 
         self.turn = not self.turn
-        self.incrementalHash ^= ZobristHash.POLYGLOT[780]
+        self.incrementalHash ^= POLYGLOT[780]
+
+        if castlingRights != self.castlingRights:
+            self.incrementalHash ^= ZobristHash.hashCastlingRights(castlingRights) ^ ZobristHash.hashCastlingRights(self.castlingRights)
+        # epSquare was only set above if one of their pawns can capture.
+        self.incrementalHash ^= ZobristHash.hashEpSquare(self.epSquare)
+
+        if self.debugHash:
+            self.checkHash()
+
+    def push(self, move):
+        """
+        play() the move and remember how to take it back with pop(). Walking
+        the children of a position with push()/pop() avoids a copy() per move.
+        """
+        captured = self.roleAt(move.to) if move.capture and move.type == Move.NORMAL else None
+        self.undo.append((Move.pack(move.type, move.role, move.from_square, move.capture, move.to, move.promotion),
+                          captured, self.castlingRights, self.epSquare, self.incrementalHash))
+        self.play(move)
+
+    def pop(self):
+        """ Take back the last push() and return the move as a new Move. """
+        code, captured, castlingRights, epSquare, incrementalHash = self.undo.pop()
+        move = Move().unpack(code)
+        self.turn = not self.turn
+
+        if move.type == Move.NORMAL:
+            self.discard(move.to)
+            self.put(move.from_square, self.turn, move.role)
+            if captured is not None:
+                self.put(move.to, not self.turn, captured)
+        elif move.type == Move.CASTLING:
+            self.discard(Square.combine(Square.D1 if move.to < move.from_square else Square.F1, move.to))
+            self.discard(Square.combine(Square.C1 if move.to < move.from_square else Square.G1, move.from_square))
+            self.put(move.from_square, self.turn, Role.KING)
+            self.put(move.to, self.turn, Role.ROOK)
+        elif move.type == Move.EN_PASSANT:
+            self.discard(move.to)
+            self.put(move.from_square, self.turn, Role.PAWN)
+            self.put(Square.combine(move.to, move.from_square), not self.turn, Role.PAWN)
+
+        self.castlingRights = castlingRights
+        self.epSquare = epSquare
+        self.incrementalHash = incrementalHash
+        return move
+
+    def setup(self):
+        """ The placement of the pieces alone, comparable the way equalSetup() compares boards. """
+        return (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings, self.white, self.black)
 
     def us(self):
         return self.byColor(self.turn)
@@ -205,15 +297,15 @@ class Board:
 
     def sliderBlockers(self, king):
         snipers = self.them() & (
-            Bitboard.rookAttacks(king, 0) & (self.rooks ^ self.queens) |
-            Bitboard.bishopAttacks(king, 0) & (self.bishops ^ self.queens))
+            Bitboard.rook_attacks(king, 0) & (self.rooks ^ self.queens) |
+            Bitboard.bishop_attacks(king, 0) & (self.bishops ^ self.queens))
 
         blockers = 0
 
         while snipers != 0:
             sniper = Bitboard.lsb(snipers)
             between = Bitboard.BETWEEN[king][sniper] & self.occupied
-            if not Bitboard.moreThanOne(between):
+            if not Bitboard.more_than_one(between):
                 blockers |= between
             snipers &= snipers - 1
 
@@ -222,16 +314,15 @@ class Board:
     def isCheck(self):
         return self.attacksTo(self.king(self.turn), not self.turn) != 0
 
-    def attacksTo(self, sq, attacker):
-        return self.attacksTo(sq, attacker, self.occupied)
-
-    def attacksTo(self, sq, attacker, occupied):
+    def attacksTo(self, sq, attacker, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
         return self.byColor(attacker) & (
-            Bitboard.rookAttacks(sq, occupied) & (self.rooks ^ self.queens) |
-            Bitboard.bishopAttacks(sq, occupied) & (self.bishops ^ self.queens) |
+            Bitboard.rook_attacks(sq, occupied) & (self.rooks ^ self.queens) |
+            Bitboard.bishop_attacks(sq, occupied) & (self.bishops ^ self.queens) |
             Bitboard.KNIGHT_ATTACKS[sq] & self.knights |
             Bitboard.KING_ATTACKS[sq] & self.kings |
-            Bitboard.pawnAttacks(not attacker, sq) & self.pawns)
+            Bitboard.pawn_attacks(not attacker, sq) & self.pawns)
 
     def legalMoves(self, moves):
         moves.clear()
@@ -259,7 +350,7 @@ class Board:
 
         king = self.king(self.turn)
         blockers = self.sliderBlockers(king)
-        return moves.anyMatch(lambda m: self.isSafe(king, m, blockers))
+        return moves.any_match(lambda m: self.isSafe(king, m, blockers))
 
     def genNonKing(self, mask, moves):
         self.genPawn(mask, moves)
@@ -270,37 +361,37 @@ class Board:
             targets = Bitboard.KNIGHT_ATTACKS[from_] & mask
             while targets != 0:
                 to = Bitboard.lsb(targets)
-                moves.pushNormal(self, Role.KNIGHT, from_, self.isOccupied(to), to)
+                moves.push_normal(self, Role.KNIGHT, from_, self.isOccupied(to), to)
                 targets &= targets - 1
             knights &= knights - 1
 
         bishops = self.us() & self.bishops
         while bishops != 0:
             from_ = Bitboard.lsb(bishops)
-            targets = Bitboard.bishopAttacks(from_, self.occupied) & mask
+            targets = Bitboard.bishop_attacks(from_, self.occupied) & mask
             while targets != 0:
                 to = Bitboard.lsb(targets)
-                moves.pushNormal(self, Role.BISHOP, from_, self.isOccupied(to), to)
+                moves.push_normal(self, Role.BISHOP, from_, self.isOccupied(to), to)
                 targets &= targets - 1
             bishops &= bishops - 1
 
         rooks = self.us() & self.rooks
         while rooks != 0:
             from_ = Bitboard.lsb(rooks)
-            targets = Bitboard.rookAttacks(from_, self.occupied) & mask
+            targets = Bitboard.rook_attacks(from_, self.occupied) & mask
             while targets != 0:
                 to = Bitboard.lsb(targets)
-                moves.pushNormal(self, Role.ROOK, from_, self.isOccupied(to), to)
+                moves.push_normal(self, Role.ROOK, from_, self.isOccupied(to), to)
                 targets &= targets - 1
             rooks &= rooks - 1
 
         queens = self.us() & self.queens
         while queens != 0:
             from_ = Bitboard.lsb(queens)
-            targets = Bitboard.queenAttacks(from_, self.occupied) & mask
+            targets = Bitboard.queen_attacks(from_, self.occupied) & mask
             while targets != 0:
                 to = Bitboard.lsb(targets)
-                moves.pushNormal(self, Role.QUEEN, from_, self.isOccupied(to), to)
+                moves.push_normal(self, Role.QUEEN, from_, self.isOccupied(to), to)
                 targets &= targets - 1
             queens &= queens - 1
 
@@ -309,7 +400,7 @@ class Board:
         while targets != 0:
             to = Bitboard.lsb(targets)
             if self.attacksTo(to, not self.turn) == 0:
-                moves.pushNormal(self, Role.KING, king, self.isOccupied(to), to)
+                moves.push_normal(self, Role.KING, king, self.isOccupied(to), to)
             targets &= targets - 1
 
     def genEvasions(self, king, checkers, moves):
@@ -322,7 +413,7 @@ class Board:
 
         self.genSafeKing(king, ~self.us() & ~attacked, moves)
 
-        if checkers != 0 and not Bitboard.moreThanOne(checkers):
+        if checkers != 0 and not Bitboard.more_than_one(checkers):
             checker = Bitboard.lsb(checkers)
             target = Bitboard.BETWEEN[king][checker] | checkers
             self.genNonKing(target, moves)
@@ -331,14 +422,14 @@ class Board:
         capturers = self.us() & self.pawns
         while capturers != 0:
             from_ = Bitboard.lsb(capturers)
-            targets = Bitboard.pawnAttacks(self.turn, from_) & self.them() & mask
+            targets = Bitboard.pawn_attacks(self.turn, from_) & self.them() & mask
             while targets != 0:
                 to = Bitboard.lsb(targets)
                 self.addPawnMoves(from_, True, to, moves)
                 targets &= targets - 1
             capturers &= capturers - 1
 
-        singleMoves = ~self.occupied & (self.white & self.pawns) << 8 if self.turn else (self.black & self.pawns) >> 8
+        singleMoves = ~self.occupied & ((self.white & self.pawns) << 8 if self.turn else (self.black & self.pawns) >> 8)
         doubleMoves = ~self.occupied & (singleMoves << 8 if self.turn else singleMoves >> 8) & Bitboard.RANKS[3 if self.turn else 4]
         singleMoves &= mask
         doubleMoves &= mask
@@ -352,23 +443,23 @@ class Board:
         while doubleMoves != 0:
             to = Bitboard.lsb(doubleMoves)
             from_ = to + (-16 if self.turn else 16)
-            moves.pushNormal(self, Role.PAWN, from_, False, to)
+            moves.push_normal(self, Role.PAWN, from_, False, to)
             doubleMoves &= doubleMoves - 1
 
     def addPawnMoves(self, from_, capture, to, moves):
         if Square.rank(to) == (7 if self.turn else 0):
-            moves.pushPromotion(self, from_, capture, to, Role.QUEEN)
-            moves.pushPromotion(self, from_, capture, to, Role.KNIGHT)
-            moves.pushPromotion(self, from_, capture, to, Role.ROOK)
-            moves.pushPromotion(self, from_, capture, to, Role.BISHOP)
+            moves.push_promotion(self, from_, capture, to, Role.QUEEN)
+            moves.push_promotion(self, from_, capture, to, Role.KNIGHT)
+            moves.push_promotion(self, from_, capture, to, Role.ROOK)
+            moves.push_promotion(self, from_, capture, to, Role.BISHOP)
         else:
-            moves.pushNormal(self, Role.PAWN, from_, capture, to)
+            moves.push_normal(self, Role.PAWN, from_, capture, to)
 
     def genEnPassant(self, moves):
-        pawns = self.us() & self.pawns & Bitboard.pawnAttacks(not self.turn, self.epSquare)
+        pawns = self.us() & self.pawns & Bitboard.pawn_attacks(not self.turn, self.epSquare)
         while pawns != 0:
             pawn = Bitboard.lsb(pawns)
-            moves.pushEnPassant(self, pawn, self.epSquare)
+            moves.push_en_passant(self, pawn, self.epSquare)
             pawns &= pawns - 1
 
     def genCastling(self, king, moves):
@@ -385,7 +476,7 @@ class Board:
                         break
                     kingPath &= kingPath - 1
                 if kingPath == 0:
-                    moves.pushCastle(self, king, rook)
+                    moves.push_castle(self, king, rook)
             rooks &= rooks - 1
 
     def isSafe(self, king, move, blockers):
@@ -396,8 +487,8 @@ class Board:
             occupied ^= 1 << move.from_square
             occupied ^= 1 << Square.combine(move.to, move.from_square)  # captured pawn
             occupied |= 1 << move.to
-            return (Bitboard.rookAttacks(king, occupied) & self.them() & (self.rooks ^ self.queens)) == 0 and \
-                   (Bitboard.bishopAttacks(king, occupied) & self.them() & (self.bishops ^ self.queens)) == 0
+            return (Bitboard.rook_attacks(king, occupied) & self.them() & (self.rooks ^ self.queens)) == 0 and \
+                   (Bitboard.bishop_attacks(king, occupied) & self.them() & (self.bishops ^ self.queens)) == 0
         else:
             return True
 
@@ -414,8 +505,10 @@ class Board:
         self.occupied = Bitboard.rotate180(self.occupied)
 
         self.castlingRights = Bitboard.rotate180(self.castlingRights)
+        if self.epSquare != 0:
+            self.epSquare ^= 63
 
-        self.incrementalHash = ZobristHash.hashPieces(self)
+        self.rehash()
 
     D4 = 1 << Square.square(3, 3)
     D5 = 1 << Square.square(3, 4)
@@ -1,5 +1,6 @@
 from board import Board
 from dgt_constants import DgtConstants
+from role import Role
 
 class DgtProtocolException(Exception):
     pass
@@ -10,12 +11,28 @@ class BoardDump:
             print(data)
             raise DgtProtocolException("BoardDump expects exactly 64 bytes of data")
         
-        self.board = Board.empty_board()
-        for i in range(len(data)):
-            if data[i] != DgtConstants.EMPTY:
-                square = DgtConstants.dgt_code_to_square(i)
-                color = DgtConstants.dgt_code_to_color(data[i])
-                role = DgtConstants.dgt_code_to_role(data[i])
-                self.board.put(square, color, role)
+        self.data = bytes(data)
+
+        squares = DgtConstants.SQUARE_TABLE
+        colors = DgtConstants.COLOR_TABLE
+        roles = DgtConstants.ROLE_TABLE
+        # Indexed by Role.index, which matches the order of the Board constructor.
+        masks = [0] * len(Role)
+        white = 0
+        black = 0
+        for i, code in enumerate(self.data):
+            if code == DgtConstants.EMPTY:
+                continue
+            role = roles[code]
+            if role is None:
+                raise DgtProtocolException(f"Invalid piece code 0x{code:x}")
+            mask = 1 << squares[i]
+            masks[role.index] |= mask
+            if colors[code]:
+                white |= mask
+            else:
+                black |= mask
+
+        self.board = Board(*masks, white, black, True, 0, 0)
 
 
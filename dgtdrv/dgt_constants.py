@@ -1,13 +1,5 @@
 
-import enum
-
-class Role(enum.Enum):
-    PAWN = 1
-    KNIGHT = 2
-    BISHOP = 3
-    ROOK = 4
-    QUEEN = 5
-    KING = 6
+from role import Role
 
 # Constants used in board communication, and conversion utilities.
 class DgtConstants:
@@ -176,3 +168,18 @@ class DgtConstants:
 class DgtProtocolException(Exception):
     pass
 
+def _decoding_table(convert, codes):
+    table = [None] * 256
+    for code in codes:
+        try:
+            table[code] = convert(code)
+        except DgtProtocolException:
+            pass
+    return table
+
+# Lookup tables indexed by a raw DGT byte, so hot decoding paths (BoardDump,
+# FieldUpdate) cost one list index per square instead of a function call.
+# Codes the converters reject map to None.
+DgtConstants.SQUARE_TABLE = _decoding_table(DgtConstants.dgt_code_to_square, range(64))
+DgtConstants.COLOR_TABLE = _decoding_table(DgtConstants.dgt_code_to_color, range(256))
+DgtConstants.ROLE_TABLE = _decoding_table(DgtConstants.dgt_code_to_role, range(256))
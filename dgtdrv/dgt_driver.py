@@ -22,12 +22,34 @@ from dgt_protocol_exception import DgtProtocolException
 from dgt_constants import DgtConstants
 
 class DgtDriver:
+    # Consumed bytes are only dropped from the front of the buffer once this
+    # many have piled up, so a burst of messages is framed in linear time.
+    COMPACT_THRESHOLD = 4096
+    # Reads that leave at most this many unframed bytes, which is most serial
+    # reads, are framed straight from the read instead of through the buffer.
+    SHORT_CHUNK = 256
+
     def __init__(self, read, write):
         self.readCallback = read
         self.writeCallback = write
-        self.buffer = array.array('b', [0] * 128)
-        self.position = 0
+        self.buffer = bytearray()
+        self.start = 0
         self.readyForClockMessage = True
+        # Message id (without the 0x80 marker bit) to payload decoder.
+        self.decoders = {
+            DgtConstants.DGT_NONE: self.ignore_message,
+            DgtConstants.DGT_BOARD_DUMP: BoardDump,
+            DgtConstants.DGT_BWTIME: self.decode_bwtime,
+            DgtConstants.DGT_FIELD_UPDATE: FieldUpdate,
+            DgtConstants.DGT_EE_MOVES: EEMoves,
+            DgtConstants.DGT_BUSADRES: Busadress,
+            DgtConstants.DGT_SERIALNR: SerialnrMessage,
+            DgtConstants.DGT_TRADEMARK: TrademarkMessage,
+            DgtConstants.DGT_VERSION: VersionMessage,
+            DgtConstants.DGT_BOARD_DUMP_50B: self.ignore_message,
+            DgtConstants.DGT_BOARD_DUMP_50W: self.ignore_message,
+            DgtConstants.DGT_LONG_SERIALNR: LongSerialnrMessage,
+        }
 
     def reset(self):
         self.write_byte(DgtConstants.DGT_SEND_RESET)
@@ -107,81 +129,104 @@ class DgtDriver:
         return self.send_clock_message(ClockBeepMessage(duration))
 
     def got_bytes(self, bytes):
-        if self.position + len(bytes) > len(self.buffer):
-            self.buffer = array.array('b', self.buffer) + array.array('b', [0] * len(bytes))
-        self.buffer[self.position:self.position + len(bytes)] = array.array('b', bytes)
-        self.position += len(bytes)
-        self.try_emit_message()
-        if len(self.buffer) > 128 and self.position < 128:
-            self.buffer = array.array('b', self.buffer[:128])
-
-    def try_emit_message(self):
-        while self.position >= 3:
-            message = self.buffer[0]
-            sizeMsb = self.buffer[1]
-            sizeLsb = self.buffer[2]
-            if (message & 0x80) == 0:
-                self.scroll_bad_bytes(1)
-                continue
-            if (sizeMsb & 0x80) != 0:
-                self.scroll_bad_bytes(2)
-                continue
-            if (sizeLsb & 0x80) != 0:
-                self.scroll_bad_bytes(3)
-                continue
+        messages = []
+        if len(self.buffer) - self.start + len(bytes) <= self.SHORT_CHUNK:
+            if self.buffer:
+                bytes = self.buffer[self.start:] + bytes
+                del self.buffer[:]
+                self.start = 0
+            end = self.frame(bytes, 0, messages)
+            if end < len(bytes):
+                self.buffer += bytes[end:]
+        else:
+            self.buffer += bytes
+            with memoryview(self.buffer) as view:
+                self.start = self.frame(view, self.start, messages)
+            if self.start == len(self.buffer):
+                del self.buffer[:]
+                self.start = 0
+            elif self.start >= self.COMPACT_THRESHOLD:
+                del self.buffer[:self.start]
+                self.start = 0
+        # dispatched only once the buffer is no longer exported, so a
+        # callback may feed the driver more bytes
+        for msg in messages:
+            self.readCallback(msg)
+
+    def frame(self, data, position, messages):
+        """
+        Frame every complete message of `data`, a short read or a memoryview
+        of the buffer, from `position` on and append the decoded ones to
+        `messages`. Payloads are handed to the constructors as slices of
+        `data`; memoryview slices are released as soon as the constructor
+        returns, so constructors must copy anything they keep. Returns the
+        index of the first byte of an incomplete message, or len(data) if
+        there is none.
+        """
+        end = len(data)
+        while end - position >= 3:
+            message = data[position]
+            sizeMsb = data[position + 1]
+            sizeLsb = data[position + 2]
             messageLen = (sizeMsb << 7) | sizeLsb
-            if messageLen > self.position:
-                return
-            msg = None
-            try:
-                data = self.buffer[3:messageLen] if messageLen > 3 else []
-                self.buffer[:self.position - messageLen] = self.buffer[messageLen:self.position]
-                self.position -= messageLen
-                if (message & 0x7f) == DgtConstants.DGT_NONE:
+            if (message & 0x80) == 0 or messageLen < 3:
+                skip = 1
+            elif (sizeMsb & 0x80) != 0:
+                skip = 2
+            elif (sizeLsb & 0x80) != 0:
+                skip = 3
+            else:
+                if messageLen > end - position:
+                    break
+                msg = None
+                payload = data[position + 3:position + messageLen]
+                try:
+                    msg = self.decode_message(message & 0x7f, payload)
+                except Exception as e:
                     pass
-                elif (message & 0x7f) == DgtConstants.DGT_BOARD_DUMP:
-                    msg = BoardDump(data)
-                elif (message & 0x7f) == DgtConstants.DGT_BWTIME:
-                    if (data[0] & 0x0f) == 0x0a or (data[3] & 0x0f) == 0x0a:
-                        self.readyForClockMessage = True
-                        msg = ClockAck(data)
-                    elif data[0] == 0 and data[1] == 0 and data[2] == 0 and data[3] == 0 and data[4] == 0 and data[5] == 0 and data[6] == 0:
-                        pass
-                    else:
-                        msg = BWTime(data)
-                elif (message & 0x7f) == DgtConstants.DGT_FIELD_UPDATE:
-                    msg = FieldUpdate(data)
-                elif (message & 0x7f) == DgtConstants.DGT_EE_MOVES:
-                    msg = EEMoves(data)
-                elif (message & 0x7f) == DgtConstants.DGT_BUSADRES:
-                    msg = Busadress(data)
-                elif (message & 0x7f) == DgtConstants.DGT_SERIALNR:
-                    msg = SerialnrMessage(data)
-                elif (message & 0x7f) == DgtConstants.DGT_TRADEMARK:
-                    msg = TrademarkMessage(data)
-                elif (message & 0x7f) == DgtConstants.DGT_VERSION:
-                    msg = VersionMessage(data)
-                elif (message & 0x7f) == DgtConstants.DGT_BOARD_DUMP_50B:
-                    return
-                elif (message & 0x7f) == DgtConstants.DGT_BOARD_DUMP_50W:
-                    return
-                elif (message & 0x7f) == DgtConstants.DGT_LONG_SERIALNR:
-                    msg = LongSerialnrMessage(data)
-                else:
-                    raise DgtProtocolException("Unknown message id %x from board" % (message & 0x7f))
-            except Exception as e:
+                if type(payload) is memoryview:
+                    payload.release()
+                position += messageLen
+                if msg is not None:
+                    messages.append(msg)
                 continue
-            if msg is not None:
-                self.readCallback(msg)
-
-    def scroll_bad_bytes(self, start):
-        good = start
-        while good < self.position:
-            if (self.buffer[good] & 0x80) != 0:
-                break
-            good += 1
-        self.buffer[:self.position - good] = self.buffer[good:self.position]
-        self.position -= good
+            # skip the bad bytes and anything up to the next message id
+            position += skip
+            while position < end and (data[position] & 0x80) == 0:
+                position += 1
+        return position
+
+    def pending_payload(self, offset=0):
+        """
+        Peek at a message that has started arriving but is not complete yet.
+
+        Returns:
+            tuple: The message id and a copy of its payload received so far,
+            starting at `offset`, or None if no message is in progress.
+        """
+        if len(self.buffer) - self.start < 3:
+            return None
+        message = self.buffer[self.start] & 0x7f
+        return message, bytes(self.buffer[self.start + 3 + offset:])
+
+    def decode_message(self, message, data):
+        decoder = self.decoders.get(message)
+        if decoder is None:
+            raise DgtProtocolException("Unknown message id %x from board" % message)
+        return decoder(data)
+
+    def decode_bwtime(self, data):
+        if (data[0] & 0x0f) == 0x0a or (data[3] & 0x0f) == 0x0a:
+            self.readyForClockMessage = True
+            return ClockAck(data)
+        elif data[0] == 0 and data[1] == 0 and data[2] == 0 and data[3] == 0 and data[4] == 0 and data[5] == 0 and data[6] == 0:
+            return None
+        else:
+            return BWTime(data)
+
+    @staticmethod
+    def ignore_message(data):
+        return None
 
     def write_byte(self, b):
         self.writeCallback(array.array('b', [b]))
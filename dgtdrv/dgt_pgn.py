@@ -2,11 +2,11 @@
 import argparse
 import datetime
 import base64
-import serial # type: ignore
 import time
 
 
 from dgt_driver import DgtDriver
+from serial_transport import SerialTransport
 from dgt_message import DgtMessage
 from bw_time import BWTime
 from board import Board
@@ -19,9 +19,7 @@ class DgtPgn:
     def __init__(self, port_name: str, prefix: str, debug: bool):
         print(f"Connecting to {port_name}")
         self.output_prefix = prefix
-        self.port = serial.Serial(port_name, 9600, parity=serial.PARITY_NONE, bytesize=8, stopbits=1)
-        if not self.port.is_open:
-            raise RuntimeError(f"Failed to open port {port_name}.")
+        self.port = SerialTransport(port_name, 9600)
 
         self.driver = DgtDriver(self.got_message, self.write_bytes)
 
@@ -53,12 +51,11 @@ class DgtPgn:
         if self.debug_out is not None:
             print(f"Starting read loop, outputPrefix={self.output_prefix}")
         while True:
-            data = self.port.read(self.port.in_waiting)
-            if not data:
-                time.sleep(0.2)
-            else:
-                self.debug_write(True, data)
-                self.driver.got_bytes(data)
+            self.port.pump(self.got_bytes)
+
+    def got_bytes(self, data: bytes):
+        self.debug_write(True, data)
+        self.driver.got_bytes(data)
 
     def write_bytes(self, bytes: bytes):
         try:
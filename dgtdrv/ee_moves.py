@@ -16,66 +16,83 @@ class EEMoves:
     EE_NOP2 = 0x00
 
     def __init__(self, data):
-        events = []
-        i = 0
-        while i < len(data):
-            value = data[i]
-            if (0x6a <= value <= 0x6f) or (0x7a <= value <= 0x7f) or value == 0x00:
-                events.append(self.SimpleEvent(value))
-                i += 1
-            elif 0x40 <= value <= 0x5f:
-                if i + 1 >= len(data):
-                    break
-                events.append(self.FieldEvent(value & 0x0f, data[i+1]))
-                i += 2
-            elif (0x60 <= value <= 0x69) or (0x70 <= value <= 0x79):
-                if i + 2 >= len(data):
-                    break
-                events.append(self.ClockEvent((value & 0x10) == 0x10, value & 0x0f, data[i+1], data[i+2]))
-                i += 3
-            else:
-                i += 1
-
-        self.events = events
+        self.events = self.Decoder().feed(data)
 
     def visitEvents(self, visitor):
         for e in self.events:
-            if isinstance(e, self.SimpleEvent):
-                simpleEvent = e
-                if simpleEvent.type == self.EE_POWERUP:
-                    visitor.powerup()
-                elif simpleEvent.type == self.EE_EOF:
-                    visitor.eof()
-                elif simpleEvent.type == self.EE_FOURROWS:
-                    visitor.fourRows()
-                elif simpleEvent.type == self.EE_EMPTYBOARD:
-                    visitor.emptyBoard()
-                elif simpleEvent.type == self.EE_DOWNLOADED:
-                    visitor.downloaded()
-                elif simpleEvent.type == self.EE_BEGINPOS:
-                    visitor.initialPosition(False)
-                elif simpleEvent.type == self.EE_BEGINPOS_ROT:
-                    visitor.initialPosition(True)
-                elif simpleEvent.type == self.EE_START_TAG:
-                    visitor.startTag()
-                elif simpleEvent.type == self.EE_WATCHDOG_ACTION:
-                    visitor.watchdogAction()
-                elif simpleEvent.type == self.EE_NOP or simpleEvent.type == self.EE_NOP2:
-                    pass
-                elif simpleEvent.type == self.EE_FUTURE_1:
-                    visitor.future1()
-                elif simpleEvent.type == self.EE_FUTURE_2:
-                    visitor.future2()
-                else:
-                    raise Exception(f"Unknown simple event code 0x{simpleEvent.type:x}")
-            elif isinstance(e, self.ClockEvent):
-                clockEvent = e
-                visitor.clockUpdate(clockEvent)
-            elif isinstance(e, self.FieldEvent):
-                fieldEvent = e
-                visitor.fieldUpdate(fieldEvent)
+            self.visitEvent(e, visitor)
+
+    @classmethod
+    def visitEvent(cls, e, visitor):
+        if isinstance(e, cls.SimpleEvent):
+            simpleEvent = e
+            if simpleEvent.type == cls.EE_POWERUP:
+                visitor.powerup()
+            elif simpleEvent.type == cls.EE_EOF:
+                visitor.eof()
+            elif simpleEvent.type == cls.EE_FOURROWS:
+                visitor.fourRows()
+            elif simpleEvent.type == cls.EE_EMPTYBOARD:
+                visitor.emptyBoard()
+            elif simpleEvent.type == cls.EE_DOWNLOADED:
+                visitor.downloaded()
+            elif simpleEvent.type == cls.EE_BEGINPOS:
+                visitor.initialPosition(False)
+            elif simpleEvent.type == cls.EE_BEGINPOS_ROT:
+                visitor.initialPosition(True)
+            elif simpleEvent.type == cls.EE_START_TAG:
+                visitor.startTag()
+            elif simpleEvent.type == cls.EE_WATCHDOG_ACTION:
+                visitor.watchdogAction()
+            elif simpleEvent.type == cls.EE_NOP or simpleEvent.type == cls.EE_NOP2:
+                pass
+            elif simpleEvent.type == cls.EE_FUTURE_1:
+                visitor.future1()
+            elif simpleEvent.type == cls.EE_FUTURE_2:
+                visitor.future2()
             else:
-                raise Exception(f"Unknown event class {e.__class__.__name__}")
+                raise Exception(f"Unknown simple event code 0x{simpleEvent.type:x}")
+        elif isinstance(e, cls.ClockEvent):
+            clockEvent = e
+            visitor.clockUpdate(clockEvent)
+        elif isinstance(e, cls.FieldEvent):
+            fieldEvent = e
+            visitor.fieldUpdate(fieldEvent)
+        else:
+            raise Exception(f"Unknown event class {e.__class__.__name__}")
+
+    class Decoder:
+        """
+        Turns EEPROM bytes into events. Bytes may be fed in arbitrary pieces,
+        e.g. as a DGT_EE_MOVES message trickles in over the serial line; an
+        event split across two pieces is held back until it is complete.
+        """
+        def __init__(self):
+            self.pending = b''
+
+        def feed(self, data):
+            data = self.pending + bytes(data)
+            events = []
+            i = 0
+            while i < len(data):
+                value = data[i]
+                if (0x6a <= value <= 0x6f) or (0x7a <= value <= 0x7f) or value == 0x00:
+                    events.append(EEMoves.SimpleEvent(value))
+                    i += 1
+                elif 0x40 <= value <= 0x5f:
+                    if i + 1 >= len(data):
+                        break
+                    events.append(EEMoves.FieldEvent(value & 0x0f, data[i+1]))
+                    i += 2
+                elif (0x60 <= value <= 0x69) or (0x70 <= value <= 0x79):
+                    if i + 2 >= len(data):
+                        break
+                    events.append(EEMoves.ClockEvent((value & 0x10) == 0x10, value & 0x0f, data[i+1], data[i+2]))
+                    i += 3
+                else:
+                    i += 1
+            self.pending = data[i:]
+            return events
 
     class SimpleEvent:
         def __init__(self, type):
@@ -1,4 +1,4 @@
-from dgt_constants import DgtConstants
+from dgt_constants import DgtConstants, DgtProtocolException
 
 class FieldUpdate:
     """
@@ -16,8 +16,12 @@ class FieldUpdate:
         if len(data) != 2:
             raise ValueError("Field update expects exactly two bytes of data")
 
-        self.square = DgtConstants.dgtCodeToSquare(data[0])
-        self.color = DgtConstants.dgtCodeToColor(data[1])
-        self.role = DgtConstants.dgtCodeToRole(data[1])
+        self.dgt_square = data[0]
+        self.dgt_piece = data[1]
+        self.square = DgtConstants.SQUARE_TABLE[data[0]]
+        self.color = DgtConstants.COLOR_TABLE[data[1]]
+        self.role = DgtConstants.ROLE_TABLE[data[1]]
+        if self.square is None or self.color is None or (self.role is None and data[1] != DgtConstants.EMPTY):
+            raise DgtProtocolException(f"Invalid field update 0x{data[0]:x} 0x{data[1]:x}")
 
 
@@ -32,16 +32,16 @@ class Move:
         self.capture = capture
         self.to = to
         self.promotion = promotion
+        self.score = Move.score_of(board.turn, board.pawns & board.them(), role, from_square, capture, to, promotion)
 
-        defending_pawns = (
-            Bitboard.pawn_attacks(board.turn, to)
-            & board.pawns
-            & board.them()
-        )
+    @staticmethod
+    def score_of(turn, their_pawns, role, from_square, capture, to, promotion):
+        """ Ordering score of a move made by `turn` against a side with pawns on `their_pawns`. """
+        defending_pawns = Bitboard.pawn_attacks(turn, to) & their_pawns
 
-        move_value = self.piece_value(board, role, to) - self.piece_value(board, role, from_square)
+        move_value = Move.piece_value(turn, role, to) - Move.piece_value(turn, role, from_square)
 
-        self.score = (
+        return (
             (promotion.index << 26 if promotion else 0)
             + (1 << 25 if capture else 0)
             + ((6 if defending_pawns == 0 else 5 - role.index) << 22)
@@ -50,6 +50,25 @@ class Move:
             + from_square
         )
 
+    # A move packed into one unsigned 32 bit integer, as MoveList stores it:
+    # from (6 bits), to (6), role (3), promotion index + 1 or 0 (3), type (2),
+    # capture (1).
+    @staticmethod
+    def pack(move_type, role, from_square, capture, to, promotion):
+        return (from_square | (to << 6) | (role.index << 12) | ((promotion.index + 1 if promotion else 0) << 15)
+                | (move_type << 18) | (capture << 20))
+
+    def unpack(self, code, score=None):
+        self.from_square = code & 0x3f
+        self.to = (code >> 6) & 0x3f
+        self.role = ROLES[(code >> 12) & 7]
+        promotion = (code >> 15) & 7
+        self.promotion = ROLES[promotion - 1] if promotion else None
+        self.type = (code >> 18) & 3
+        self.capture = bool(code & (1 << 20))
+        self.score = score
+        return self
+
     def __lt__(self, other):
         return self.score < other.score
 
@@ -73,8 +92,10 @@ class Move:
         return self.capture or self.role == Role.PAWN
 
     @staticmethod
-    def piece_value(board, role, square):
-        return PSQT[role.index][board.turn ^ Square.mirror(square)]
+    def piece_value(turn, role, square):
+        return PSQT[role.index][Square.mirror(square) if turn else square]
+
+ROLES = list(Role)
 
 PSQT = [
     [0, 0, 0, 0, 0, 0, 0, 0, 50, 50, 50, 50, 50, 50, 50, 50, 10, 10, 20, 30, 30, 20, 10, 10, 5, 5, 10, 25, 25, 10, 5, 5, 0, 0, 0, 20, 21, 0, 0, 0, 5, -5, -10, 0, 0, -10, -5, 5, 5, 10, 10, -31, -31, 10, 10, 5, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -1,51 +1,89 @@
+from array import array
 from move import Move
 from role import Role
 
 class MoveList:
+    """
+    Moves packed into an array('I') as produced by Move.pack. Move objects
+    are only made when a caller asks for one: indexing and iteration return
+    new Moves, while retain() and any_match() hand the predicate a single
+    reused Move that must not be kept.
+
+    Ordering scores are not computed while moves are generated, since only
+    sort() needs them and recognition never sorts. The list remembers the
+    side to move and the opposing pawns of the board the moves were
+    generated on, and sort() scores the moves from those.
+    """
     def __init__(self, capacity=256):
-        self.buffer = [Move() for _ in range(capacity)]
-        self.size = 0
+        # array grows as needed; capacity only matters to callers of the old
+        # preallocated list.
+        self.codes = array('I')
+        self.scores = None
+        self.turn = None
+        self.their_pawns = 0
+        self.cursor = Move()
 
     def clear(self):
-        self.size = 0
+        del self.codes[:]
+        self.scores = None
 
     def __len__(self):
-        return self.size
+        return len(self.codes)
 
     def __getitem__(self, i):
-        assert i < self.size
-        return self.buffer[i]
+        assert i < len(self.codes)
+        return Move().unpack(self.codes[i], self.score(i))
 
     def is_empty(self):
-        return self.size == 0
+        return len(self.codes) == 0
+
+    def score(self, i):
+        return self.scores[i] if self.scores is not None else None
+
+    def push(self, board, move_type, role, from_pos, capture, to, promotion):
+        if not self.codes:
+            self.turn = board.turn
+            self.their_pawns = board.pawns & board.them()
+        self.codes.append(Move.pack(move_type, role, from_pos, capture, to, promotion))
+        self.scores = None
 
     def push_normal(self, board, role, from_pos, capture, to):
-        self.buffer[self.size].set(board, Move.NORMAL, role, from_pos, capture, to, None)
-        self.size += 1
+        self.push(board, Move.NORMAL, role, from_pos, capture, to, None)
 
     def push_promotion(self, board, from_pos, capture, to, promotion):
-        self.buffer[self.size].set(board, Move.NORMAL, Role.PAWN, from_pos, capture, to, promotion)
-        self.size += 1
+        self.push(board, Move.NORMAL, Role.PAWN, from_pos, capture, to, promotion)
 
     def push_castle(self, board, king, rook):
-        self.buffer[self.size].set(board, Move.CASTLING, Role.KING, king, False, rook, None)
-        self.size += 1
+        self.push(board, Move.CASTLING, Role.KING, king, False, rook, None)
 
     def push_en_passant(self, board, capturer, to):
-        self.buffer[self.size].set(board, Move.EN_PASSANT, Role.PAWN, capturer, True, to, None)
-        self.size += 1
+        self.push(board, Move.EN_PASSANT, Role.PAWN, capturer, True, to, None)
 
     def sort(self):
-        self.buffer = sorted(self.buffer[:self.size])
+        cursor = self.cursor
+        scores = [Move.score_of(self.turn, self.their_pawns, move.role, move.from_square, move.capture, move.to, move.promotion)
+                  for move in map(cursor.unpack, self.codes)]
+        order = sorted(range(len(self.codes)), key=scores.__getitem__)
+        self.codes = array('I', [self.codes[i] for i in order])
+        self.scores = array('q', [scores[i] for i in order])
 
     def any_match(self, predicate):
-        return any(predicate(move) for move in self.buffer[:self.size])
+        cursor = self.cursor
+        return any(predicate(cursor.unpack(code)) for code in self.codes)
 
     def retain(self, predicate):
-        self.buffer = [move for move in self.buffer[:self.size] if predicate(move)]
-        self.size = len(self.buffer)
+        cursor = self.cursor
+        kept = 0
+        for i in range(len(self.codes)):
+            if predicate(cursor.unpack(self.codes[i], self.score(i))):
+                self.codes[kept] = self.codes[i]
+                if self.scores is not None:
+                    self.scores[kept] = self.scores[i]
+                kept += 1
+        del self.codes[kept:]
+        if self.scores is not None:
+            del self.scores[kept:]
 
     def __iter__(self):
-        return iter(self.buffer[:self.size])
-
-
+        for i, code in enumerate(self.codes):
+            yield Move().unpack(code, self.score(i))
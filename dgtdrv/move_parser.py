@@ -1,102 +1,19 @@
-from square import Square
-
 from typing import List, Optional
-from enum import Enum
-from collections import defaultdict
+from board import Board
 from board_dump import BoardDump
 from field_update import FieldUpdate
+from move import Move
 from move_list import MoveList
+from result import Result
+from role import Role
+from square import Square
 
-class Color(Enum):
-    WHITE = 0
-    BLACK = 1
-
-class Role(Enum):
-    KING = 0
-    QUEEN = 1
-    ROOK = 2
-    BISHOP = 3
-    KNIGHT = 4
-    PAWN = 5
-
-class Result(Enum):
-    WHITE_WIN = 0
-    BLACK_WIN = 1
-    DRAW = 2
-
-class Square:
-    @staticmethod
-    def rank(square: int) -> int:
-        return square // 8
-
-    @staticmethod
-    def file(square: int) -> int:
-        return square % 8
-
-
-class Board:
-    def __init__(self):
-        self.pieces = [[None] * 8 for _ in range(8)]
-
-    def equal_setup(self, other: 'Board') -> bool:
-        for rank in range(8):
-            for file in range(8):
-                if self.pieces[rank][file] != other.pieces[rank][file]:
-                    return False
-        return True
-
-    def role_at(self, square: int) -> Optional[Role]:
-        rank = Square.rank(square)
-        file = Square.file(square)
-        return self.pieces[rank][file]
-
-    def discard(self, square: int) -> None:
-        rank = Square.rank(square)
-        file = Square.file(square)
-        self.pieces[rank][file] = None
-
-    def put(self, square: int, color: Color, role: Role) -> None:
-        rank = Square.rank(square)
-        file = Square.file(square)
-        self.pieces[rank][file] = (color, role)
-
-    def rotate180(self) -> None:
-        for rank in range(4):
-            for file in range(8):
-                self.pieces[rank][file], self.pieces[7 - rank][7 - file] = self.pieces[7 - rank][7 - file], self.pieces[rank][file]
-
-    def result_signal(self) -> Optional[Result]:
-        # Check if both kings are in the central four squares
-        white_king_square = None
-        black_king_square = None
-        for rank in range(3, 5):
-            for file in range(3, 5):
-                if self.pieces[rank][file] == (Color.WHITE, Role.KING):
-                    white_king_square = rank * 8 + file
-                elif self.pieces[rank][file] == (Color.BLACK, Role.KING):
-                    black_king_square = rank * 8 + file
-        if white_king_square is not None and black_king_square is not None:
-            if Square.rank(white_king_square) % 2 == Square.file(white_king_square) % 2:
-                return Result.WHITE_WIN
-            elif Square.rank(black_king_square) % 2 == Square.file(black_king_square) % 2:
-                return Result.BLACK_WIN
-            else:
-                return Result.DRAW
-        return None
-
-class Move:
-    CASTLING = 0
-
-    initial_position = Board()
-    rotated_initial_position = Board()
-    rotated_initial_position.rotate180()
+INITIAL_POSITION = Board.standard()
+ROTATED_INITIAL_POSITION = Board.standard()
+ROTATED_INITIAL_POSITION.rotate180()
 
-    def __init__(self, from_square: int, to_square: int, role: Role, capture: bool, promotion: Optional[Role] = None):
-        self.from_square = from_square
-        self.to_square = to_square
-        self.role = role
-        self.capture = capture
-        self.promotion = promotion
+# Positions whose children MoveParser remembers, by Zobrist key.
+CHILDREN_CACHE_SIZE = 64
 
 class BWTime:
     def __init__(self, white_time: int, black_time: int):
@@ -120,22 +37,49 @@ class Game:
 
 class MoveParser:
     class ReachablePosition:
-        def __init__(self, board: Board, from_, via: Optional[Move]):
+        """
+        A position one move away from a position the board has been in. The
+        board is only made by materialize(), once the physical board reaches it.
+        `key` is the Zobrist key of the position, under which its children are
+        cached; `placement` is the key of the pieces alone, which is all the
+        physical board can show.
+        `shadowed` is the earlier game position with the same placement, put
+        back in the index when this one is taken back.
+        """
+        __slots__ = ('board', 'from_', 'via', 'time_info', 'key', 'placement', 'shadowed')
+
+        def __init__(self, board: Optional[Board], from_, via: Optional[Move], key: int, placement: int):
             self.board = board
             self.from_ = from_
             self.via = via
             self.time_info = None
+            self.key = key
+            self.placement = placement
+            self.shadowed = None
+
+        @staticmethod
+        def reached(board: Board, from_, via: Optional[Move]) -> 'MoveParser.ReachablePosition':
+            return MoveParser.ReachablePosition(board, from_, via, board.zobristHash(), board.placementHash())
+
+        def materialize(self) -> Board:
+            if self.board is None:
+                self.board = self.from_.board.copy()
+                self.board.play(self.via)
+            return self.board
 
     def __init__(self, game_callback):
         self.game_callback = game_callback
         self.board_state = None
-        self.positions = {}
+        self.history = {}
+        self.children = {}
+        self.children_cache = {}
         self.seen_initial_position = False
         self.rotate = False
         self.last_reachable = None
 
     def reset_state(self):
-        self.positions = {}
+        self.history = {}
+        self.children = {}
         self.seen_initial_position = False
         self.rotate = False
         self.last_reachable = None
@@ -147,10 +91,10 @@ class MoveParser:
             update = msg
             if self.board_state is None:
                 raise ValueError("Got FieldUpdate message before initial BoardDump.")
-            new_state = Board(self.board_state)
+            new_state = self.board_state.copy()
             square = update.square ^ 63 if self.rotate else update.square
             if update.role is None:
-                if new_state.role_at(square) is None:
+                if new_state.roleAt(square) is None:
                     raise ValueError("Piece removed from empty square.")
                 new_state.discard(square)
             else:
@@ -170,27 +114,38 @@ class MoveParser:
             self.handle_normal_update()
 
     def pre_initial_position(self):
-        if self.board_state.equal_setup(self.initial_position):
+        if self.board_state.equalSetup(INITIAL_POSITION):
             self.seen_initial_position = True
-            self.last_reachable = self.ReachablePosition(self.initial_position, None, None)
-            self.positions[self.last_reachable] = self.last_reachable
-            self.add_reachable_positions(self.last_reachable, self.positions)
-        elif self.board_state.equal_setup(self.rotated_initial_position):
+            self.start(self.ReachablePosition.reached(INITIAL_POSITION.copy(), None, None))
+        elif self.board_state.equalSetup(ROTATED_INITIAL_POSITION):
             self.seen_initial_position = True
-            self.last_reachable = self.ReachablePosition(self.initial_position, None, None)
-            self.positions[self.last_reachable] = self.last_reachable
-            self.add_reachable_positions(self.last_reachable, self.positions)
+            self.start(self.ReachablePosition.reached(INITIAL_POSITION.copy(), None, None))
             self.board_state.rotate180()
             self.rotate = True
 
+    def start(self, root):
+        self.last_reachable = root
+        self.history = {root.placement: root}
+        self.children = self.reachable_positions(root)
+
     def handle_normal_update(self):
-        p = self.ReachablePosition(self.board_state, None, None)
-        reachable = self.positions.get(p)
-        if reachable is not None:
-            self.add_reachable_positions(reachable, self.positions)
-            self.last_reachable = reachable
+        # The children are looked up first, so a move that repeats an earlier
+        # placement continues the game rather than rewinding it; any other
+        # game position is a takeback.
+        placement = self.board_state.placementHash()
+        reachable = self.children.get(placement)
+        if reachable is None:
+            reachable = self.history.get(placement)
+        if reachable is not None and reachable.materialize().equalSetup(self.board_state):
+            if reachable is not self.last_reachable:
+                if reachable.from_ is self.last_reachable:
+                    self.push(reachable)
+                else:
+                    self.take_back(reachable)
+                self.children = self.reachable_positions(reachable)
+                self.last_reachable = reachable
         else:
-            result = self.board_state.result_signal()
+            result = self.board_state.resultSignal()
             if result is not None:
                 self.game_callback(self.current_game(result))
                 self.reset_state()
@@ -204,13 +159,15 @@ class MoveParser:
         if self.last_reachable is None:
             return Game([], None)
         moves = []
-        for reachable in self.last_reachable:
+        reachable = self.last_reachable
+        while reachable.via is not None:
             moves.insert(0, PlayedMove(
                 self.move_to_san(reachable),
                 reachable.time_info,
                 reachable.board,
                 reachable.via
             ))
+            reachable = reachable.from_
         return Game(moves, result)
 
     def board_state(self):
@@ -228,49 +185,79 @@ class MoveParser:
         else:
             if r.via.role == Role.PAWN:
                 if r.via.capture:
-                    sb += MoveParser.files[Square.file(r.via.from_)]
+                    sb += MoveParser.files[Square.file(r.via.from_square)]
             else:
-                sb.append(r.via.role.symbol)
+                sb += r.via.role.symbol
                 moves = MoveList()
-                r.from_.board.legal_moves(moves)
+                r.from_.board.legalMoves(moves)
                 rank = False
                 file = False
                 for m in moves:
-                    if m.to != r.via.to or m.role != r.via.role or m.promotion != r.via.promotion or m.from_ == r.via.from_:
+                    if m.to != r.via.to or m.role != r.via.role or m.promotion != r.via.promotion or m.from_square == r.via.from_square:
                         continue
-                    if Square.rank(m.from_) == Square.rank(r.via.from_) or Square.file(m.from_) != Square.file(r.via.from_):
+                    if Square.rank(m.from_square) == Square.rank(r.via.from_square) or Square.file(m.from_square) != Square.file(r.via.from_square):
                         file = True
                     else:
                         rank = True
                 if file:
-                    sb.append(MoveParser.files[Square.file(r.via.from_)])
+                    sb += MoveParser.files[Square.file(r.via.from_square)]
                 if rank:
-                    sb.append(MoveParser.ranks[Square.rank(r.via.from_)])
+                    sb += MoveParser.ranks[Square.rank(r.via.from_square)]
             if r.via.capture:
-                sb.append('x')
-            sb.append(MoveParser.square_string(r.via.to))
-        if r.board.is_check():
+                sb += 'x'
+            sb += MoveParser.square_string(r.via.to)
+        if r.board.isCheck():
             moves = MoveList()
-            r.board.legal_moves(moves)
+            r.board.legalMoves(moves)
             if len(moves) > 0:
-                sb.append('+')
+                sb += '+'
             else:
-                sb.append('#')
-        return ''.join(sb)
+                sb += '#'
+        return sb
 
     @staticmethod
     def square_string(square):
         return MoveParser.files[Square.file(square)] + MoveParser.ranks[Square.rank(square)]
 
-    @staticmethod
-    def add_reachable_positions(from_, positions):
-        moves = MoveList()
-        from_.board.legal_moves(moves)
-        for m in moves:
-            new_board = Board(from_.board)
-            new_board.play(m)
-            reachable = MoveParser.ReachablePosition(new_board, from_, m)
-            positions[reachable] = reachable
-
-
-
+    def push(self, reachable):
+        """ Add the position a move reached to the game positions. """
+        reachable.shadowed = self.history.get(reachable.placement)
+        self.history[reachable.placement] = reachable
+
+    def take_back(self, reachable):
+        """ Drop the game positions after `reachable`, which is one of them. """
+        position = self.last_reachable
+        while position is not reachable:
+            if position.shadowed is None:
+                del self.history[position.placement]
+            else:
+                self.history[position.placement] = position.shadowed
+            position = position.from_
+
+    def reachable_positions(self, from_):
+        """
+        Every child of `from_` by its placement key. The moves and keys of the
+        children are cached under the Zobrist key of `from_`, so a position
+        that is taken back to, repeated or reached by transposition does not
+        generate them again; the CHILDREN_CACHE_SIZE least recently used
+        positions are kept. Children are visited in place with push()/pop();
+        none of them gets a Board of its own until the physical board
+        reaches it.
+        """
+        children = self.children_cache.pop(from_.key, None)
+        if children is None:
+            children = []
+            board = from_.board
+            moves = MoveList()
+            board.legalMoves(moves)
+            for m in moves:
+                board.push(m)
+                children.append((m, board.zobristHash(), board.placementHash()))
+                board.pop()
+            if len(self.children_cache) >= CHILDREN_CACHE_SIZE:
+                del self.children_cache[next(iter(self.children_cache))]
+        self.children_cache[from_.key] = children
+        positions = {}
+        for m, key, placement in children:
+            positions[placement] = MoveParser.ReachablePosition(None, from_, m, key, placement)
+        return positions
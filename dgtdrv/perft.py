@@ -0,0 +1,121 @@
+import argparse
+import sys
+import time
+
+from board import Board
+from move_list import MoveList
+
+# Standard perft positions with their known node counts per depth, from
+# https://www.chessprogramming.org/Perft_Results
+POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", [20, 400, 8902, 197281]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890]),
+]
+
+def perft(board, depth, lists=None):
+    """
+    Count the leaf nodes of the legal move tree `depth` plies deep. One
+    MoveList per ply is allocated up front and reused for every node, and
+    children are visited in place with push()/pop().
+    """
+    if lists is None:
+        lists = [MoveList() for _ in range(depth)]
+    moves = lists[depth - 1]
+    board.legalMoves(moves)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft(board, depth - 1, lists)
+        board.pop()
+    return nodes
+
+def divide(board, depth):
+    """ perft split by first move, for finding where two generators disagree. """
+    moves = MoveList()
+    board.legalMoves(moves)
+    result = {}
+    for move in moves:
+        child = board.copy()
+        child.play(move)
+        result[move.uci()] = perft(child, depth - 1) if depth > 1 else 1
+    return result
+
+def generation_throughput(board, repeat, ordered):
+    """ Moves generated per second by legalMoves on `board`, with or without sorting them. """
+    moves = MoveList()
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        board.legalMoves(moves)
+        if ordered:
+            moves.sort()
+    return len(moves) * repeat / (time.perf_counter() - begin)
+
+def print_generation_benchmark(repeat):
+    """
+    Recognition only needs the legal moves, search also needs them ordered;
+    compare the two workloads on every standard position.
+    """
+    print(f"{'position':12} {'recognition':>14} {'ordered':>14}")
+    for name, fen, expected in POSITIONS:
+        board = Board.fromFen(fen)
+        recognition = generation_throughput(board, repeat, False)
+        ordered = generation_throughput(board, repeat, True)
+        print(f"{name:12} {recognition:9.0f} mv/s {ordered:9.0f} mv/s")
+
+def default_argument_parser(for_name: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(for_name, description="Verify and time the dgtdrv Board move generator with perft")
+    parser.add_argument("--depth", type=int, default=3, help="Deepest ply to run for every position")
+    parser.add_argument("--position", type=str, help="Only run the standard position with this name")
+    parser.add_argument("--fen", type=str, help="Print a divide of this position at --depth instead")
+    parser.add_argument("--generation", type=int, metavar="REPEAT", help="Time REPEAT move generations per position instead")
+    parser.add_argument("--verify-hash", action="store_true", help="Check the incremental Zobrist hash after every move (slow)")
+    return parser
+
+def main():
+    parser = default_argument_parser("perft")
+    args = parser.parse_args()
+
+    Board.debugHash = args.verify_hash
+
+    if args.generation:
+        print_generation_benchmark(args.generation)
+        return
+
+    if args.fen:
+        total = 0
+        for uci, nodes in sorted(divide(Board.fromFen(args.fen), args.depth).items()):
+            print(f"{uci}: {nodes}")
+            total += nodes
+        print(f"total: {total}")
+        return
+
+    failures = 0
+    total_nodes = 0
+    total_time = 0
+    print(f"{'position':12} {'depth':>5} {'nodes':>10} {'expected':>10} {'time':>9} {'nodes/s':>10}")
+    for name, fen, expected in POSITIONS:
+        if args.position and args.position != name:
+            continue
+        for depth in range(1, min(args.depth, len(expected)) + 1):
+            board = Board.fromFen(fen)
+            begin = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - begin
+            total_nodes += nodes
+            total_time += elapsed
+            status = "" if nodes == expected[depth - 1] else "  MISMATCH"
+            failures += status != ""
+            print(f"{name:12} {depth:5} {nodes:10} {expected[depth - 1]:10} {elapsed:8.3f}s {nodes / elapsed:10.0f}{status}")
+    print(f"{'total':12} {'':5} {total_nodes:10} {'':10} {total_time:8.3f}s {total_nodes / total_time:10.0f}")
+    if failures:
+        print(f"{failures} mismatches")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
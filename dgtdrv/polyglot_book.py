@@ -0,0 +1,99 @@
+import mmap
+import random
+import struct
+
+from move import Move
+from move_list import MoveList
+from role import Role
+
+class PolyglotBook:
+    """
+    A Polyglot opening book (.bin), memory-mapped and searched in place.
+    Entries are sorted by position key, so the entries of a position are
+    found with a binary search over the mapped file; nothing is read until a
+    position is looked up and opening even a very large book is immediate.
+    Board.zobristHash() is the Polyglot key of a position.
+    """
+    # key, move, weight, learn; big-endian
+    ENTRY = struct.Struct('>QHHI')
+    KEY = struct.Struct('>Q')
+
+    # Promotion piece of a Polyglot move, indexed by bits 12-14.
+    PROMOTIONS = [None, Role.KNIGHT, Role.BISHOP, Role.ROOK, Role.QUEEN]
+
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        size = self.file.seek(0, 2)
+        # An empty file cannot be mapped; it is a book without entries.
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b''
+        self.count = size // PolyglotBook.ENTRY.size
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self.file.close()
+
+    def key_at(self, i):
+        return PolyglotBook.KEY.unpack_from(self.map, i * PolyglotBook.ENTRY.size)[0]
+
+    def first(self, key):
+        """ Index of the first entry with a key not less than `key`. """
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def entries(self, key):
+        """ (move, weight, learn) of every entry of the position with Polyglot `key`, in file order. """
+        i = self.first(key)
+        while i < self.count:
+            entry_key, move, weight, learn = PolyglotBook.ENTRY.unpack_from(self.map, i * PolyglotBook.ENTRY.size)
+            if entry_key != key:
+                break
+            yield move, weight, learn
+            i += 1
+
+    @staticmethod
+    def decode(move):
+        """
+        from square, to square and promotion role of a Polyglot move. Castling
+        is encoded as the king taking its own rook, which is how Move stores
+        it too.
+        """
+        to = move & 0x3f
+        from_square = (move >> 6) & 0x3f
+        promotion = (move >> 12) & 7
+        return from_square, to, PolyglotBook.PROMOTIONS[promotion] if promotion < len(PolyglotBook.PROMOTIONS) else None
+
+    def weighted_moves(self, board):
+        """
+        The book moves of `board` as (Move, weight) pairs, heaviest first.
+        Entries that are not legal moves of the board are skipped.
+        """
+        legal = {}
+        moves = MoveList()
+        board.legalMoves(moves)
+        for m in moves:
+            legal[(m.from_square, m.to, m.promotion)] = m
+        result = []
+        for move, weight, learn in self.entries(board.zobristHash()):
+            m = legal.get(PolyglotBook.decode(move))
+            if m is not None:
+                result.append((m, weight))
+        result.sort(key=lambda entry: entry[1], reverse=True)
+        return result
+
+    def choice(self, board, rng=random):
+        """ A book move of `board` picked with probability proportional to its weight, or None. """
+        moves = [(m, weight) for m, weight in self.weighted_moves(board) if weight > 0]
+        if not moves:
+            return None
+        return rng.choices([m for m, weight in moves], [weight for m, weight in moves])[0]
@@ -0,0 +1,132 @@
+import threading
+import serial # type: ignore
+
+class RingBuffer:
+    """
+    Fixed-size byte FIFO. Not thread safe on its own; SerialTransport guards
+    every access with its condition variable.
+    """
+    def __init__(self, capacity: int):
+        self.buffer = bytearray(capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def free(self) -> int:
+        return self.capacity - self.size
+
+    def write(self, data) -> int:
+        data = memoryview(data)[:self.free()]
+        count = len(data)
+        end = (self.start + self.size) % self.capacity
+        first = min(count, self.capacity - end)
+        self.buffer[end:end + first] = data[:first]
+        self.buffer[:count - first] = data[first:]
+        self.size += count
+        return count
+
+    def read(self, size=None) -> bytes:
+        count = self.size if size is None else min(size, self.size)
+        end = self.start + count
+        if end <= self.capacity:
+            data = bytes(self.buffer[self.start:end])
+        else:
+            data = bytes(self.buffer[self.start:]) + bytes(self.buffer[:end - self.capacity])
+        self.start = end % self.capacity
+        self.size -= count
+        return data
+
+class SerialTransport:
+    """
+    Owns the serial port of a DGT board. A background thread blocks on the
+    port with a short timeout and appends whatever arrived to a fixed-size
+    ring buffer; readers either drain it with read() or hand each chunk
+    straight to a consumer such as DgtDriver.got_bytes with pump(). When the
+    ring buffer is full the reader thread stops reading and lets the OS buffer
+    hold the remaining bytes until a consumer catches up.
+
+    read(), write(), in_waiting, is_open and close() follow pyserial, so the
+    helpers in utils work on either a transport or a plain serial.Serial.
+    """
+    def __init__(self, port_name: str, baudrate: int = 9600, read_timeout: float = 0.1, buffer_size: int = 4096):
+        self.port = serial.Serial(port_name, baudrate, timeout=read_timeout)
+        if not self.port.is_open:
+            raise RuntimeError(f"Failed to open port {port_name}.")
+        self.read_timeout = read_timeout
+        self.ring = RingBuffer(buffer_size)
+        self.condition = threading.Condition()
+        self.running = True
+        self.error = None
+        self.thread = threading.Thread(target=self.read_loop, name=f"dgt-reader-{port_name}", daemon=True)
+        self.thread.start()
+
+    @property
+    def is_open(self) -> bool:
+        return self.running and self.port.is_open
+
+    @property
+    def in_waiting(self) -> int:
+        with self.condition:
+            return len(self.ring)
+
+    def read_loop(self):
+        try:
+            while self.running:
+                with self.condition:
+                    while self.running and self.ring.free() == 0:
+                        self.condition.wait()
+                    free = self.ring.free()
+                data = self.port.read(min(max(1, self.port.in_waiting), free))
+                if data:
+                    with self.condition:
+                        self.ring.write(data)
+                        self.condition.notify_all()
+        except (serial.SerialException, OSError, TypeError) as e:
+            # TypeError/OSError are what pyserial raises when the port is
+            # closed underneath a blocking read.
+            if self.running:
+                self.error = e
+        finally:
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+
+    def read(self, size=None, timeout=None) -> bytes:
+        """
+        Wait up to `timeout` seconds (the transport's read timeout by
+        default) for data and return at most `size` buffered bytes, or all of
+        them when `size` is None. Returns b'' on timeout.
+        """
+        if size == 0:
+            return b''
+        if timeout is None:
+            timeout = self.read_timeout
+        with self.condition:
+            if len(self.ring) == 0:
+                self.condition.wait_for(lambda: len(self.ring) > 0 or not self.running, timeout)
+            if self.error is not None and len(self.ring) == 0:
+                raise serial.SerialException(self.error)
+            data = self.ring.read(size)
+            self.condition.notify_all()
+            return data
+
+    def pump(self, consumer, timeout=None) -> int:
+        """ Pass the next chunk of received bytes to `consumer`, e.g. DgtDriver.got_bytes. """
+        data = self.read(timeout=timeout)
+        if data:
+            consumer(data)
+        return len(data)
+
+    def write(self, data):
+        return self.port.write(data)
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.port.close()
+        if self.thread is not threading.current_thread():
+            self.thread.join(self.read_timeout * 2 + 1)
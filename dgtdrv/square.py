@@ -37,6 +37,6 @@ class Square:
 
     @staticmethod
     def aligned(a, b, c):
-        return c in Bitboard.RAYS[a][b]
+        return Bitboard.contains(Bitboard.RAYS[a][b], c)
 
 
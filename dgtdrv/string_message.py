@@ -1,3 +1,3 @@
 class StringMessage:
     def __init__(self, data):
-        self.value = data.decode('ascii')
+        self.value = bytes(data).decode('ascii')
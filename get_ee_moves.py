@@ -1,11 +1,10 @@
 import argparse
-import sys, os, time, datetime
-import serial
+import sys, os, time, datetime, json, hashlib
 import chess
 from utils import *
 
-def save_game(game, folder, game_index):
-    filename = folder + str(game_index) + '.game'
+def save_game(game, folder, name):
+    filename = folder + str(name) + '.game'
     game_fen = game.fen()
 
     moves = []
@@ -14,31 +13,94 @@ def save_game(game, folder, game_index):
         moves.append(game.pop())
 
     moves.reverse()
-    with open(filename, 'w') as file:
+    # 'x' so a saved game is never overwritten
+    with open(filename, 'x') as file:
         file.write(time.strftime("%Y-%m-%d_%H.%M.%S\n"))
         for move in moves:
             file.write(move.uci() + '\n')
 
-def save_games(events):
+def save_games(games):
     print('saving games...')
     folder = time.strftime("saved_games/%Y-%m-%d_%H.%M.%S/")
     os.makedirs(folder)
 
-    # wait for first starting position message
     game_index = 0
-    for game in get_ee_games(events):
+    for game in games:
         game_index += 1
         save_game(game, folder, game_index)
     print('saved ' + str(game_index) + ' games to ' + folder)
 
+SYNC_STATE_FILE = 'sync.json'
+
+def board_folder(serial_number):
+    name = ''.join(c for c in serial_number if c.isalnum() or c in '-_') if serial_number else ''
+    return 'saved_games/' + (name or 'unknown_board') + '/'
+
+def sync_games(download, folder, workers):
+    """
+    Save only the games that changed since the last sync of this board.
+    sync.json keeps one fingerprint per game: a hash chained over every event
+    of that game and all games before it. Games whose fingerprint matches the
+    stored one are neither reconstructed nor saved again; from the first
+    mismatch on (a new game, a game that grew, or a board memory that was
+    cleared) every game is saved as N_<fingerprint>.game, N being its position
+    on the board. The fingerprint keeps a renumbered game from replacing one
+    archived by an earlier sync; a file that already exists holds the same
+    game and is left alone.
+    """
+    os.makedirs(folder, exist_ok=True)
+    state_filename = folder + SYNC_STATE_FILE
+    known = []
+    if os.path.isfile(state_filename):
+        with open(state_filename) as file:
+            known = json.load(file)['fingerprints']
+
+    fingerprints = []
+    indexes = []
+    def changed_segments():
+        digest = hashlib.sha1()
+        for game_index, game_events in enumerate(ee_game_segments(download.events())):
+            for event in game_events:
+                digest.update(str(event).encode())
+                digest.update(b'\n')
+            digest.update(b'\0')
+            fingerprints.append(digest.hexdigest())
+            if game_index < len(known) and known[game_index] == fingerprints[-1]:
+                continue
+            if game_index < len(known) - 1 and not indexes:
+                print('board memory changed since last sync, saving again from game ' + str(game_index + 1))
+            indexes.append(game_index)
+            yield game_events
+
+    saved = 0
+    for i, game in enumerate(reconstruct_ee_games(changed_segments(), workers)):
+        game_index = indexes[i]
+        name = str(game_index + 1) + '_' + fingerprints[game_index][:12]
+        try:
+            save_game(download.game_ready(game), folder, name)
+            saved += 1
+        except FileExistsError:
+            pass
+
+    with open(state_filename, 'w') as file:
+        json.dump({'fingerprints': fingerprints}, file)
+    print('synced ' + str(saved) + ' of ' + str(len(fingerprints)) + ' games to ' + folder)
+
 def print_events(events):
     for event in events:
         print(event)
 
+def print_download_stats(download):
+    print('downloaded %d bytes in %.2f s (%.0f bytes/s)' % (download.bytes_received, download.elapsed(), download.throughput()))
+    if download.first_game_time is not None:
+        print('first game ready after %.2f s' % download.first_game_time)
+
 def default_argument_parser(for_name: str) -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(for_name, description="Test pulling games off board EEPROM")
     parser.add_argument("--port", type=str, default="COM9", help="Name of serial port to connect to")
     parser.add_argument('--save', action=argparse.BooleanOptionalAction, help="Save games to files")
+    parser.add_argument('--sync', action=argparse.BooleanOptionalAction, help="Save only games that are new since the last sync of this board")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of processes reconstructing games, 1 to stay in-process")
     return parser
 
 def main():
@@ -46,16 +108,21 @@ def main():
     args = parser.parse_args()
     port = args.port
     save = args.save
-    ser = serial.Serial(port=port, baudrate=9600)
+    sync = args.sync
+    workers = args.workers
+    ser = SerialTransport(port)
     time.sleep(0.1)
     board_reset(ser)
     time.sleep(0.1)
-    events = get_ee_events(ser)
+    download = EEDownload(ser)
 
-    if save:
-        save_games(events)
+    if sync:
+        sync_games(download, board_folder(get_dgt_serial_number(ser)), workers)
+    elif save:
+        save_games(download.games(workers))
     else:
-        print_events(events)
+        print_events(download.events())
+    print_download_stats(download)
 
 if __name__ == '__main__':
     try:
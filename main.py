@@ -1,7 +1,6 @@
 import argparse
 
 import sys, os, time
-import serial
 import chess
 
 from utils import *
@@ -19,42 +18,50 @@ def main():
     args = parser.parse_args()
     port = args.port
 
-    ser = serial.Serial(port=port, baudrate=9600)
+    ser = SerialTransport(port, read_timeout=0.5)
     board_reset(ser)
+    watcher = DgtBoardWatcher()
+    driver = DgtDriver(watcher.got_message, ser.write)
+    start_board_updates(driver)
     board = chess.Board()
-    legal_moves = legal_fens(board)
-    fen_history = list()
+    history = PlacementHistory(STARTING_PLACEMENT)
+    opening_cache = open_opening_cache()
+    searched_placement = None
     cls()
     print_board(board)
     
     while True:
-        request_board_state(ser)
-        time.sleep(0.1)
-        s = b''
-        bytes_read = 0
-        while(ser.in_waiting > 0):
-            c = ser.read(1)
-            s += c
-            bytes_read += 1
+        # blocks until the board pushes something or the read times out
+        ser.pump(driver.got_bytes)
+        if not watcher.changed:
+            continue
 
-        fen = dgt_message_to_fen(s)
-        previous_fen = previous_fen_from_history(fen_history)
-        if fen == STARTING_FEN and previous_fen != '':
-            board = chess.Board()
-            legal_moves = legal_fens(board)
-            fen_history = list()
+        placement = watcher.placement()
+        # a legal move wins over a takeback to an identical earlier placement,
+        # so repeating a position does not rewind the game
+        if (move := recognize_move(board, history.current, placement)) is not None:
+            board.push(move)
+            history.push(placement)
+            searched_placement = None
             print_board(board)
-        elif previous_fen == fen:
-            board.pop()
-            fen_history.pop()
-            legal_moves = legal_fens(board)
-            print_board(board)
-        elif fen in legal_moves:
-            move = legal_moves[fen]
-            fen_history.append(fen_from_board(board))
-            board.push_uci(move)
-            legal_moves = legal_fens(board)
+        elif (ply := history.ply_of(placement)) is not None:
+            # taken back to an earlier position, possibly several moves ago
+            while len(board.move_stack) > ply:
+                board.pop()
+            history.rewind(ply)
+            searched_placement = None
             print_board(board)
+        elif placement != searched_placement:
+            # a placement that explains no moves, e.g. a piece in the hand,
+            # is only searched once, not on every update while it lasts
+            searched_placement = placement
+            moves = reconcile_moves(board, history.current, placement, cache=opening_cache)
+            for move in moves or []:
+                history.push(bytes(apply_move_to_squares(board, history.current, move)))
+                board.push(move)
+            if moves is not None:
+                searched_placement = None
+                print_board(board)
 
 if __name__ == '__main__':
     try:
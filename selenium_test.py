@@ -2,6 +2,7 @@ import sys, os, time
 
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.by import By
 
 from utils import *
 from dgt_constants import *
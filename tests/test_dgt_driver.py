@@ -0,0 +1,35 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dgtdrv'))
+from dgt_constants import DgtConstants
+from dgt_driver import DgtDriver
+from field_update import FieldUpdate
+
+def field_update(square, piece):
+    return bytes([0x80 | DgtConstants.DGT_FIELD_UPDATE, 0, 5, square, piece])
+
+class DgtDriverTest(unittest.TestCase):
+    def test_callback_feeds_more_bytes(self):
+        # A callback that feeds the driver while a long read is being framed
+        # must not find the buffer exported.
+        for short_chunk in (0, DgtDriver.SHORT_CHUNK):
+            messages = []
+            def got_message(msg):
+                messages.append(msg)
+                if len(messages) == 1:
+                    driver.got_bytes(field_update(1, DgtConstants.WPAWN) * 50)
+            driver = DgtDriver(got_message, lambda data: None)
+            driver.SHORT_CHUNK = short_chunk
+            driver.got_bytes(field_update(2, DgtConstants.BPAWN) * 100)
+            self.assertEqual(len(messages), 150)
+            self.assertTrue(all(isinstance(msg, FieldUpdate) for msg in messages))
+
+    def test_message_split_across_reads(self):
+        messages = []
+        driver = DgtDriver(messages.append, lambda data: None)
+        data = field_update(3, DgtConstants.WKING) + b'\x00' + field_update(4, DgtConstants.BKING)
+        for i in range(len(data)):
+            driver.got_bytes(data[i:i + 1])
+        self.assertEqual([msg.dgt_square for msg in messages], [3, 4])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chess
+from utils import placement_from_board, reconcile_moves
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+class ReconcileMovesTest(unittest.TestCase):
+    def test_two_plies_from_kiwipete(self):
+        # Every reply to the last of White's 48 moves, so the sequence is
+        # only found if the budget does not run out before that ply-1 child
+        # is checked.
+        board = chess.Board(KIWIPETE)
+        before = placement_from_board(board)
+        for first in list(board.legal_moves)[-1:] + list(board.legal_moves)[:1]:
+            board.push(first)
+            for second in list(board.legal_moves):
+                board.push(second)
+                after = placement_from_board(board)
+                board.pop()
+                moves = reconcile_moves(chess.Board(KIWIPETE), before, after)
+                self.assertIsNotNone(moves, first.uci() + ' ' + second.uci())
+                replay = chess.Board(KIWIPETE)
+                for move in moves:
+                    replay.push(move)
+                self.assertEqual(placement_from_board(replay), after)
+            board.pop()
+
+    def test_time_budget(self):
+        board = chess.Board(KIWIPETE)
+        before = placement_from_board(board)
+        board.push(chess.Move.from_uci('e1g1'))
+        board.push(chess.Move.from_uci('e8c8'))
+        after = placement_from_board(board)
+        self.assertIsNotNone(reconcile_moves(chess.Board(KIWIPETE), before, after))
+        self.assertIsNone(reconcile_moves(chess.Board(KIWIPETE), before, after, time_budget=0))
+
+    def test_unreachable_placement(self):
+        board = chess.Board(KIWIPETE)
+        after = bytearray(placement_from_board(board))
+        after[0], after[63] = after[63], after[0]
+        self.assertIsNone(reconcile_moves(board, placement_from_board(board), bytes(after)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,30 @@
-import os, time, enum, datetime
+import os, sys, time, enum, datetime, collections, hashlib, mmap, struct, threading
+import concurrent.futures
+# The dgtdrv modules import each other by plain module name, so the folder
+# goes on the path. The top-level scripts come first on the path, so none of
+# them may share a name with a dgtdrv module or it would replace that module
+# for dgtdrv as well.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dgtdrv'))
 from square import *
 import chess
-import pyautogui
+import chess.polyglot
 
 from dgt_constants import *
+from dgt_driver import DgtDriver
+from board_dump import BoardDump
+from field_update import FieldUpdate
+from ee_moves import EEMoves
+from serial_nr_message import SerialnrMessage
+from long_serial_nr_message import LongSerialnrMessage
+from serial_transport import SerialTransport
+from board import Board as DgtBoard
+from polyglot_book import PolyglotBook
 
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver import ActionChains
+# selenium and pyautogui are imported by the functions that drive the browser
+# or the mouse, so the board and placement helpers load without them.
+
+STARTING_FEN ='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'
+FULL_STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
 
 def move_cursor(y, x):
     print("\033[%d;%dH" % (y, x))
@@ -49,12 +66,7 @@ def piece_byte_to_ascii(piece_byte):
     else:
         raise ValueError("Invalid piece detected")
 
-def dgt_message_to_fen(message):
-    stripped_message = message[3:]
-    if(len(stripped_message) != 64):
-        print("Invalid board state message")
-        return ''
-    
+def dgt_squares_to_fen(squares):
     result = ''
     empty_count = 0
     for rev_rank in range(0, 8):
@@ -67,7 +79,7 @@ def dgt_message_to_fen(message):
         for rev_file in range(0, 8):
             file = 7 - rev_file
             message_index = (rank * 8) + file
-            piece = piece_byte_to_ascii(stripped_message[message_index])
+            piece = piece_byte_to_ascii(squares[message_index])
             if len(piece) == 0:
                 empty_count += 1
             elif empty_count > 0:
@@ -80,30 +92,509 @@ def dgt_message_to_fen(message):
             
     return result
 
-def fen_from_board(board):
-    fen = board.fen()
-    return fen[:fen.find(' ')]
-
 def is_white_to_move(board):
     fen = board.fen()
     return fen[fen.index(' ')+1:][0] == 'w'
 
-def legal_fens(board):
-    legal_moves = list(board.legal_moves)
+# Index of each python-chess square in a DGT board dump, matching the layout
+# dgt_squares_to_fen reads.
+DGT_INDEX = [chess.square_rank(square) * 8 + 7 - chess.square_file(square) for square in chess.SQUARES]
+
+PIECE_BYTES = {
+    'P': DgtConstants.WPAWN,
+    'R': DgtConstants.WROOK,
+    'N': DgtConstants.WKNIGHT,
+    'B': DgtConstants.WBISHOP,
+    'K': DgtConstants.WKING,
+    'Q': DgtConstants.WQUEEN,
+    'p': DgtConstants.BPAWN,
+    'r': DgtConstants.BROOK,
+    'n': DgtConstants.BKNIGHT,
+    'b': DgtConstants.BBISHOP,
+    'k': DgtConstants.BKING,
+    'q': DgtConstants.BQUEEN,
+}
+
+def dgt_squares_from_board(board):
+    squares = bytearray(64)
+    for square, piece in board.piece_map().items():
+        squares[DGT_INDEX[square]] = PIECE_BYTES[piece.symbol()]
+    return squares
+
+def placement_from_board(board):
+    """ The board's piece placement as the 64 squares of a DGT board dump. """
+    return bytes(dgt_squares_from_board(board))
+
+STARTING_PLACEMENT = placement_from_board(chess.Board())
+
+def apply_move_to_squares(board, squares, move):
+    """
+    Return a copy of `squares`, the DGT dump layout of `board`, with `move`
+    made on it, including the rook of a castling move, the pawn taken en
+    passant and the promoted piece.
+    """
+    child = bytearray(squares)
+    from_index = DGT_INDEX[move.from_square]
+    to_index = DGT_INDEX[move.to_square]
+    piece = child[from_index]
+    file_delta = chess.square_file(move.to_square) - chess.square_file(move.from_square)
+    if piece in (DgtConstants.WKING, DgtConstants.BKING) and abs(file_delta) == 2:
+        rank = chess.square_rank(move.from_square)
+        rook_from = chess.square(7 if file_delta > 0 else 0, rank)
+        rook_to = chess.square(5 if file_delta > 0 else 3, rank)
+        child[DGT_INDEX[rook_to]] = child[DGT_INDEX[rook_from]]
+        child[DGT_INDEX[rook_from]] = DgtConstants.EMPTY
+    elif piece in (DgtConstants.WPAWN, DgtConstants.BPAWN) and file_delta != 0 and child[to_index] == DgtConstants.EMPTY:
+        captured = chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square))
+        child[DGT_INDEX[captured]] = DgtConstants.EMPTY
+    if move.promotion is not None:
+        piece = PIECE_BYTES[chess.piece_symbol(move.promotion).upper() if board.turn else chess.piece_symbol(move.promotion)]
+    child[from_index] = DgtConstants.EMPTY
+    child[to_index] = piece
+    return child
+
+def legal_placements(board):
+    """
+    Index the placements reachable with one legal move, keyed by the 64 squares
+    in DGT board dump layout. Each child is made by editing a copy of the
+    parent's squares, so no moves are pushed and no FEN strings are built.
+    """
+    parent = dgt_squares_from_board(board)
     result = {}
-    for legal_move in legal_moves:
-        legal_move_uci = legal_move.uci()
-        board.push_uci(legal_move_uci)
-        fen = fen_from_board(board)
-        board.pop()
-        result[fen] = legal_move_uci
+    for move in board.legal_moves:
+        result[bytes(apply_move_to_squares(board, parent, move))] = move
     return result
 
-def previous_fen_from_history(fen_history):
-    history_len = len(fen_history)
-    if history_len > 0:
-        return fen_history[history_len-1]
-    return ''
+WHITE_PIECE_BYTES = frozenset(PIECE_BYTES[symbol] for symbol in 'PRNBKQ')
+BLACK_PIECE_BYTES = frozenset(PIECE_BYTES[symbol] for symbol in 'prnbkq')
+PIECE_TYPES = {byte: chess.Piece.from_symbol(symbol).piece_type for symbol, byte in PIECE_BYTES.items()}
+
+# A move changes at most four squares: king and rook when castling.
+MAX_MOVE_SQUARES = 4
+
+def changed_squares(before, after, limit=MAX_MOVE_SQUARES):
+    """
+    DGT indices of the squares that differ between two 64 byte placements,
+    found by XORing them as integers, or None if more than `limit` differ.
+    """
+    diff = int.from_bytes(before, 'little') ^ int.from_bytes(after, 'little')
+    changed = []
+    while diff:
+        if len(changed) == limit:
+            return None
+        index = ((diff & -diff).bit_length() - 1) >> 3
+        changed.append(index)
+        diff &= ~(0xff << (index << 3))
+    return changed
+
+def recognize_move(board, before, after):
+    """
+    Identify the legal move that turns `before`, the placement of `board`,
+    into the observed placement `after`, or return None. Only the few squares
+    that changed are looked at: a piece of the side to move must have left one
+    of them and arrived on another, and that candidate alone is checked for
+    legality, so the cost does not depend on how many moves are legal.
+    """
+    changed = changed_squares(before, after)
+    if changed is None or len(changed) < 2:
+        return None
+    own = WHITE_PIECE_BYTES if board.turn else BLACK_PIECE_BYTES
+    sources = [index for index in changed if before[index] in own and after[index] == DgtConstants.EMPTY]
+    targets = [index for index in changed if after[index] in own]
+    for source in sources:
+        for target in targets:
+            # DGT_INDEX is its own inverse: it maps dump indices back to squares
+            from_square = DGT_INDEX[source]
+            to_square = DGT_INDEX[target]
+            promotion = None
+            if before[source] in (DgtConstants.WPAWN, DgtConstants.BPAWN) and chess.square_rank(to_square) in (0, 7):
+                promotion = PIECE_TYPES[after[target]]
+            move = chess.Move(from_square, to_square, promotion)
+            if board.is_legal(move) and apply_move_to_squares(board, before, move) == after:
+                return move
+    return None
+
+# Plies reconcile_moves will look ahead, the number of positions it may
+# create while doing so, and the seconds it may take. The time budget keeps a
+# search inside the 33 ms board poll interval, with room left for reading the
+# board; two-ply sequences need only the children of the game position and are
+# found within it, three-ply ones only in quiet positions. Callers still search
+# each new placement only once, since a miss takes the whole budget.
+RECONCILE_MAX_PLIES = 3
+RECONCILE_NODE_BUDGET = 1500
+RECONCILE_TIME_BUDGET = 0.025
+
+def reconcile_moves(board, before, after, max_plies=RECONCILE_MAX_PLIES, node_budget=RECONCILE_NODE_BUDGET, cache=None, time_budget=RECONCILE_TIME_BUDGET):
+    """
+    Find the shortest sequence of at most `max_plies` legal moves that turns
+    `before`, the placement of `board`, into the observed placement `after`,
+    for when several moves were made between two observations. Returns the
+    list of moves, or None if there is none or the node or time budget ran
+    out.
+
+    The search is breadth first. Positions reached by transposition are only
+    expanded once, deduplicated by their Zobrist hash, and the last ply of
+    every line is found with recognize_move rather than by expansion. Each
+    ply's frontier is checked in full before any of it is expanded, so when
+    the node budget runs out the positions already generated are still
+    checked; the time budget stops the search wherever it is. While the game
+    is still inside an OpeningCache the search is answered from the
+    cache instead, without generating moves.
+    """
+    changed = changed_squares(before, after, MAX_MOVE_SQUARES * max_plies)
+    if changed is None or len(changed) < 2 or all(after[index] == DgtConstants.EMPTY for index in changed):
+        return None
+    if cache is not None and cache.covers(board, max_plies):
+        return cache.reconcile(board, after, max_plies)
+    deadline = time.monotonic() + time_budget
+    frontier = [(board, before, [])]
+    seen = {chess.polyglot.zobrist_hash(board)}
+    nodes = 0
+    for ply in range(max_plies):
+        for position, placement, moves in frontier:
+            if time.monotonic() >= deadline:
+                return None
+            move = recognize_move(position, placement, after)
+            if move is not None:
+                return moves + [move]
+        if ply + 1 == max_plies or nodes >= node_budget:
+            break
+        next_frontier = []
+        for position, placement, moves in frontier:
+            for move in position.legal_moves:
+                if nodes >= node_budget:
+                    break
+                if time.monotonic() >= deadline:
+                    return None
+                nodes += 1
+                child = position.copy(stack=False)
+                child.push(move)
+                key = chess.polyglot.zobrist_hash(child)
+                if key in seen:
+                    continue
+                seen.add(key)
+                next_frontier.append((child, apply_move_to_squares(position, placement, move), moves + [move]))
+        frontier = next_frontier
+    return None
+
+# The lowest bit of every square's byte in an integer read from 64 squares.
+SQUARE_BITS = int.from_bytes(bytes([1]) * 64, 'little')
+
+def placement_distance(a, b):
+    """
+    Number of squares on which two 64 byte placements differ: their XOR as an
+    integer, with each byte folded onto its lowest bit, then popcounted.
+    """
+    diff = int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')
+    diff |= diff >> 4
+    diff |= diff >> 2
+    diff |= diff >> 1
+    return bin(diff & SQUARE_BITS).count('1')
+
+SQUARE_SYMBOLS = {byte: symbol for symbol, byte in PIECE_BYTES.items()}
+
+def square_symbol(piece_byte):
+    if piece_byte == DgtConstants.EMPTY:
+        return '.'
+    return SQUARE_SYMBOLS.get(piece_byte, '?')
+
+# Positions whose legal_placements index is kept; an index takes a few kB.
+MOVE_INDEX_LRU_SIZE = 256
+
+class MoveIndexLRU:
+    """
+    Size-bounded, least recently used cache of legal_placements indexes keyed
+    by the Zobrist hash of the full position, so that positions revisited
+    through takebacks, repeated lines or new games cost nothing. Thread safe;
+    `hits` and `misses` count lookups. The cached dicts are shared and must
+    not be modified.
+    """
+    def __init__(self, maxsize=MOVE_INDEX_LRU_SIZE):
+        self.maxsize = maxsize
+        self.indexes = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __str__(self):
+        return 'move index cache | size: ' + str(len(self)) + '/' + str(self.maxsize) + ' hits: ' + str(self.hits) + ' misses: ' + str(self.misses)
+
+    def get(self, board, key=None):
+        if key is None:
+            key = chess.polyglot.zobrist_hash(board)
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is not None:
+                self.indexes.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+        index = legal_placements(board)
+        with self.lock:
+            self.indexes[key] = index
+            self.indexes.move_to_end(key)
+            while len(self.indexes) > self.maxsize:
+                self.indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self.lock:
+            self.indexes.clear()
+            self.hits = 0
+            self.misses = 0
+
+move_index_lru = MoveIndexLRU()
+
+def cached_legal_placements(board, key=None):
+    """ legal_placements through the shared move_index_lru. """
+    return move_index_lru.get(board, key)
+
+class MoveIndexCache:
+    """
+    legal_placements indexes built on a worker thread while the players
+    think: one for the game position and one for each likely reply, e.g. a
+    book move, so the index is already built when BoardResync needs it.
+    Indexes are keyed by Zobrist hash, and each prefetch drops the ones the
+    game can no longer reach.
+    """
+    def __init__(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='move-index')
+        self.futures = {}
+
+    def submit(self, key, board, futures):
+        if key in futures:
+            return
+        future = self.futures.get(key)
+        if future is None:
+            future = self.executor.submit(cached_legal_placements, board, key)
+        futures[key] = future
+
+    def prefetch(self, board, likely=()):
+        """ Index `board` and the children reached by the `likely` moves. """
+        futures = {}
+        position = board.copy(stack=False)
+        self.submit(chess.polyglot.zobrist_hash(position), position, futures)
+        for move in likely:
+            child = position.copy(stack=False)
+            child.push(move)
+            self.submit(chess.polyglot.zobrist_hash(child), child, futures)
+        for key, future in self.futures.items():
+            if key not in futures:
+                future.cancel()
+        self.futures = futures
+
+    def get(self, board):
+        """ The legal_placements index of `board`, built now if it was not prefetched. """
+        key = chess.polyglot.zobrist_hash(board)
+        future = self.futures.get(key)
+        if future is None or future.cancelled():
+            return cached_legal_placements(board, key)
+        return future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# Seconds the board has to stay unchanged before BoardResync reports it, so
+# that pieces in the middle of being moved are not reported.
+RESYNC_REPORT_DELAY = 2.0
+
+class BoardResync:
+    """
+    Works out what is wrong with a board that matches neither the game
+    position nor any position one legal move away, e.g. after a piece was
+    knocked over or a promotion piece is missing. The candidate placements
+    are built once per game position; each new observation is scored against
+    all of them with placement_distance and the nearest one is reported along
+    with the squares that differ from it. `index` builds the legal move index
+    of a position, e.g. MoveIndexCache.get.
+    """
+    def __init__(self, index=cached_legal_placements, report_delay=RESYNC_REPORT_DELAY):
+        self.index = index
+        self.report_delay = report_delay
+        self.key = None
+        self.candidates = None
+        self.observed = None
+        self.observed_time = None
+        self.reported = False
+
+    def nearest(self, board, placement, observed):
+        """
+        Return (move, target, squares): the legal move whose placement is
+        nearest to `observed`, or None if the game position itself is, that
+        placement, and the squares that have to be fixed to reach it.
+        """
+        key = chess.polyglot.zobrist_hash(board)
+        if key != self.key:
+            self.key = key
+            self.candidates = [(None, placement)] + [(move, child) for child, move in self.index(board).items()]
+        move, target = min(self.candidates, key=lambda candidate: placement_distance(candidate[1], observed))
+        squares = sorted(DGT_INDEX[index] for index in changed_squares(target, observed, 64))
+        return move, target, squares
+
+    def check(self, board, placement, observed):
+        """
+        Call on every poll that matched nothing. Returns the nearest() result
+        once the observation has stayed the same for report_delay seconds,
+        and None otherwise, so each misplacement is reported once.
+        """
+        now = time.monotonic()
+        if observed == placement:
+            self.observed = None
+            return None
+        if observed != self.observed:
+            self.observed = observed
+            self.observed_time = now
+            self.reported = False
+            return None
+        if self.reported or now - self.observed_time < self.report_delay:
+            return None
+        self.reported = True
+        return self.nearest(board, placement, observed)
+
+def describe_misplaced(target, observed, squares):
+    return ', '.join(chess.square_name(square) + ' should be ' + square_symbol(target[DGT_INDEX[square]])
+                     + ' not ' + square_symbol(observed[DGT_INDEX[square]]) for square in squares)
+
+def placement_hash(placement):
+    """ A 64 bit hash of a 64 byte placement that is stable between runs. """
+    return int.from_bytes(hashlib.blake2b(placement, digest_size=8).digest(), 'little')
+
+def encode_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+def decode_move(code):
+    return chess.Move(code & 0x3f, (code >> 6) & 0x3f, (code >> 12) or None)
+
+OPENING_CACHE_FILE = 'opening_cache.bin'
+OPENING_CACHE_MAGIC = b'DGTOPC1\0'
+# magic, plies covered, record count
+OPENING_CACHE_HEADER = struct.Struct('<8sII')
+# parent Zobrist hash, child Zobrist hash, child placement_hash, encoded move
+OPENING_CACHE_RECORD = struct.Struct('<QQQH')
+
+class OpeningCache:
+    """
+    Every move of the first plies of the game tree, written by
+    build_opening_cache.py as fixed-size records sorted by the Zobrist hash
+    of the position the move is made from. The file is memory-mapped read
+    only, so processes using it share one copy through the page cache, and
+    the moves of a position are found by binary search without generating
+    any.
+    """
+    def __init__(self, filename=OPENING_CACHE_FILE):
+        with open(filename, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.plies, self.count = OPENING_CACHE_HEADER.unpack_from(self.map, 0)
+        if magic != OPENING_CACHE_MAGIC or len(self.map) != OPENING_CACHE_HEADER.size + self.count * OPENING_CACHE_RECORD.size:
+            self.map.close()
+            raise ValueError(filename + ' is not an opening cache')
+
+    def record(self, index):
+        return OPENING_CACHE_RECORD.unpack_from(self.map, OPENING_CACHE_HEADER.size + index * OPENING_CACHE_RECORD.size)
+
+    def children(self, key):
+        """ Yield (child key, child placement hash, move) for each move from the position with Zobrist hash `key`. """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        for index in range(low, self.count):
+            parent, child, child_placement, move = self.record(index)
+            if parent != key:
+                break
+            yield child, child_placement, decode_move(move)
+
+    def covers(self, board, plies=1):
+        """ Whether every position `plies` - 1 moves after `board` has its moves in the cache. """
+        return board.root() == chess.Board() and board.ply() + plies <= self.plies
+
+    def reconcile(self, board, after, max_plies=RECONCILE_MAX_PLIES):
+        """
+        The cache's answer to reconcile_moves: the shortest sequence of at
+        most `max_plies` moves from `board` to the placement `after`, found
+        with table lookups only. Only valid when covers(board, max_plies).
+        """
+        target = placement_hash(after)
+        frontier = [(chess.polyglot.zobrist_hash(board), [])]
+        seen = {frontier[0][0]}
+        for _ in range(max_plies):
+            next_frontier = []
+            for key, moves in frontier:
+                for child, child_placement, move in self.children(key):
+                    if child_placement == target:
+                        return moves + [move]
+                    if child not in seen:
+                        seen.add(child)
+                        next_frontier.append((child, moves + [move]))
+            frontier = next_frontier
+        return None
+
+    def close(self):
+        self.map.close()
+
+def open_opening_cache(filename=OPENING_CACHE_FILE):
+    """ The opening cache in `filename`, or None if it has not been built. """
+    if not os.path.isfile(filename):
+        return None
+    return OpeningCache(filename)
+
+def open_opening_book(filename):
+    """ The Polyglot book in `filename`, or None if there is none. """
+    if filename is None or not os.path.isfile(filename):
+        return None
+    return PolyglotBook(filename)
+
+def book_replies(book, board):
+    """ The book moves of `board` as (chess.Move, weight), heaviest first; none without a book. """
+    if book is None:
+        return []
+    return [(chess.Move.from_uci(move.uci()), weight) for move, weight in book.weighted_moves(DgtBoard.fromFen(board.fen()))]
+
+def describe_book_replies(board, replies):
+    total = sum(weight for move, weight in replies) or 1
+    return ', '.join(board.san(move) + ' ' + str(round(100 * weight / total)) + '%' for move, weight in replies)
+
+class PlacementHistory:
+    """
+    The placements a game has passed through, one per ply, indexed by
+    placement so that a board returned to any earlier position is recognised
+    with one lookup instead of a walk back through the game. A placement seen
+    at several plies maps to the latest of them, the shortest takeback.
+    """
+    def __init__(self, placement):
+        self.placements = [placement]
+        self.plies = {placement: [0]}
+
+    def __len__(self):
+        return len(self.placements)
+
+    @property
+    def current(self):
+        return self.placements[-1]
+
+    def push(self, placement):
+        self.plies.setdefault(placement, []).append(len(self.placements))
+        self.placements.append(placement)
+
+    def ply_of(self, placement):
+        """ The latest ply at which `placement` was on the board, or None. """
+        plies = self.plies.get(placement)
+        return plies[-1] if plies else None
+
+    def rewind(self, ply):
+        """ Forget every placement after `ply`. """
+        while len(self.placements) > ply + 1:
+            placement = self.placements.pop()
+            plies = self.plies[placement]
+            plies.pop()
+            if not plies:
+                del self.plies[placement]
 
 def request_board_state(ser):
     ser.write(bytes([DgtConstants.DGT_SEND_BRD]))
@@ -115,20 +606,83 @@ def request_board_ee_moves(ser):
     ser.write(bytes([DgtConstants.DGT_SEND_EE_MOVES]))
 
 def receive_board_message(ser):
-    s = b''
-    bytes_read = 0
-    while(ser.in_waiting > 0):
-        c = ser.read(1)
-        s += c
-        bytes_read += 1
-    return s
-
-def get_dgt_board_state(ser):
-    request_board_state(ser)
-    time.sleep(0.3)
-    return receive_board_message(ser)
+    return ser.read(ser.in_waiting)
+
+# Seconds to wait for the board to answer a DGT_SEND_BRD request.
+BOARD_STATE_TIMEOUT = 1.0
+
+def request_dgt_message(ser, request, message_class, timeout):
+    """
+    Send a request through a DgtDriver on a SerialTransport and return the
+    first reply of type `message_class` as soon as it has been framed, or None
+    if none arrived within `timeout` seconds.
+    """
+    replies = []
+    def got_message(msg):
+        if isinstance(msg, message_class):
+            replies.append(msg)
+
+    driver = DgtDriver(got_message, ser.write)
+    receive_board_message(ser) # discard anything left over from earlier requests
+    request(driver)
+    deadline = time.monotonic() + timeout
+    while not replies:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        driver.got_bytes(ser.read(timeout=remaining))
+    return replies[0]
+
+def get_dgt_squares(ser, timeout=BOARD_STATE_TIMEOUT):
+    """
+    Request the board state and return just its 64 squares, the key used by
+    legal_placements, or None if no dump arrived within `timeout` seconds.
+    """
+    dump = request_dgt_message(ser, DgtDriver.board, BoardDump, timeout)
+    if dump is None:
+        return None
+    return dump.data
+
+def get_dgt_serial_number(ser, timeout=BOARD_STATE_TIMEOUT):
+    """ The board's long serial number, its short one if it has none, or None. """
+    msg = request_dgt_message(ser, DgtDriver.long_serialnr, LongSerialnrMessage, timeout)
+    if msg is None:
+        msg = request_dgt_message(ser, DgtDriver.serialnr, SerialnrMessage, timeout)
+    return msg.value if msg is not None else None
+
+def start_board_updates(driver):
+    driver.board()
+    driver.update_nice()
+
+class DgtBoardWatcher:
+    """
+    Mirrors the physical board from the messages a DgtDriver emits while the
+    board is in DGT_SEND_UPDATE_NICE mode. The initial BoardDump seeds the 64
+    squares and every FieldUpdate patches one of them; `changed` is only set
+    when a square actually holds a different piece than before.
+    """
+    def __init__(self):
+        self.squares = None
+        self.changed = False
+
+    def got_message(self, msg):
+        if isinstance(msg, BoardDump):
+            squares = bytearray(msg.data)
+            if squares != self.squares:
+                self.squares = squares
+                self.changed = True
+        elif isinstance(msg, FieldUpdate) and self.squares is not None:
+            if self.squares[msg.dgt_square] != msg.dgt_piece:
+                self.squares[msg.dgt_square] = msg.dgt_piece
+                self.changed = True
+
+    def placement(self):
+        self.changed = False
+        return bytes(self.squares)
 
 def get_piece_on_browser_square(driver, file, rank):
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException
     selector = '.piece.square-' + file + rank
     try:
         elem = driver.find_element(By.CSS_SELECTOR, selector)
@@ -170,6 +724,16 @@ def get_fen_from_browser(driver):
 
     return result
 
+def get_squares_from_browser(driver):
+    squares = bytearray(64)
+    coords = ['1', '2', '3', '4', '5', '6', '7', '8']
+    for rank_index, rank in enumerate(coords):
+        for file_index, file in enumerate(coords):
+            piece = get_piece_on_browser_square(driver, file, rank)
+            if len(piece) != 0:
+                squares[rank_index * 8 + 7 - file_index] = PIECE_BYTES[piece]
+    return bytes(squares)
+
 
 class Event(enum.Enum):
     EE_POWERUP = 0x6a
@@ -230,111 +794,194 @@ class ClockEvent:
     def __str__(self):
         return 'clock event | is_left: ' + str(self.isLeft) + ' ' + str(self.time)
 
-def get_ee_events(ser):
-    request_board_ee_moves(ser)
-    time.sleep(3)
-    message = bytes()
-    in_message = receive_board_message(ser)
-    while len(in_message) > 0:
-        message += in_message
-        time.sleep(3)
-        in_message = receive_board_message(ser)
-
-    events = []
-    i = 0
-    while i < len(message):
-        value = message[i]
-        if (0x6a <= value <= 0x6f) or (0x7a <= value <= 0x7f) or value == 0x00:
-            simple_event = SimpleEvent(value)
-            events.append(simple_event)
-
-            i += 1
-        elif 0x40 <= value <= 0x5f:
-            if i + 1 >= len(message):
-                break
+# Seconds of silence after which an EEPROM download is considered complete
+# if the board never sent EE_EOF.
+EE_MOVES_TIMEOUT = 3.0
 
-            field_event = FieldEvent(value & 0x0f, message[i+1])
-            events.append(field_event)
+class EEDownload(EEMoves.Visitor):
+    """
+    Streams the board's EEPROM. The DGT_EE_MOVES message is framed by a
+    DgtDriver and its events are decoded while the message is still arriving;
+    the download ends as soon as EE_EOF is seen. games() yields each game as
+    soon as the marker ending it has been received.
+    """
+    def __init__(self, ser, timeout=EE_MOVES_TIMEOUT):
+        self.ser = ser
+        self.timeout = timeout
+        self.decoder = EEMoves.Decoder()
+        self.streamed = 0
+        self.received = []
+        self.finished = False
+        self.bytes_received = 0
+        self.start_time = None
+        self.end_time = None
+        self.first_game_time = None
 
-            i += 2
-        elif (0x60 <= value <= 0x69) or (0x70 <= value <= 0x79):
-            if i + 2 >= len(message):
+    def events(self):
+        driver = DgtDriver(lambda msg: None, self.ser.write)
+        driver.decoders[DgtConstants.DGT_EE_MOVES] = self.got_ee_moves
+        receive_board_message(self.ser) # discard anything left over from earlier requests
+        self.start_time = time.monotonic()
+        driver.ee_moves()
+        while True:
+            data = self.ser.read(timeout=self.timeout)
+            if data:
+                self.bytes_received += len(data)
+                driver.got_bytes(data)
+                pending = driver.pending_payload(self.streamed)
+                if pending is not None and pending[0] == DgtConstants.DGT_EE_MOVES:
+                    self.decode(pending[1])
+                    self.streamed += len(pending[1])
+            received, self.received = self.received, []
+            yield from received
+            if self.finished or not data:
                 break
-            clock_event = ClockEvent((value & 0x10) == 0x10, value & 0x0f, message[i+1], message[i+2])
-            events.append(clock_event)
-            i += 2
-        else:
-            i += 1
-    
-    return events
+        self.end_time = time.monotonic()
 
-def get_ee_game(events, start_move_index):
-    event = None
-    move_index = start_move_index
-    game = chess.Board()
-    
-    physical_state = chess.Board()
-    legal_moves = legal_fens(game)
-    while type(event) is not SimpleEvent or (event.type != Event.EE_BEGINPOS and event.type != Event.EE_BEGINPOS_ROT and event.type != Event.EE_EOF):
-        if move_index < 0 or move_index >= len(events):
-            break
-        
-        event = events[move_index]
+    def games(self, workers=1):
+        for game in reconstruct_ee_games(ee_game_segments(self.events()), workers):
+            yield self.game_ready(game)
 
-        if type(event) is not FieldEvent:
-            move_index += 1
-            continue
+    def game_ready(self, game):
+        if self.first_game_time is None:
+            self.first_game_time = time.monotonic() - self.start_time
+        return game
 
-        square = chess.square(7 - event.file, event.rank)
-        if event.piece == Piece.EMPTY:
-            physical_state.remove_piece_at(square)
-        elif event.piece == Piece.WPAWN:
-            physical_state.set_piece_at(square, chess.Piece(chess.PAWN, chess.WHITE))
-        elif event.piece == Piece.WROOK:
-            physical_state.set_piece_at(square, chess.Piece(chess.ROOK, chess.WHITE))
-        elif event.piece == Piece.WKNIGHT:
-            physical_state.set_piece_at(square, chess.Piece(chess.KNIGHT, chess.WHITE))
-        elif event.piece == Piece.WBISHOP:
-            physical_state.set_piece_at(square, chess.Piece(chess.BISHOP, chess.WHITE))
-        elif event.piece == Piece.WKING:
-            physical_state.set_piece_at(square, chess.Piece(chess.KING, chess.WHITE))
-        elif event.piece == Piece.WQUEEN:
-            physical_state.set_piece_at(square, chess.Piece(chess.QUEEN, chess.WHITE))
-        elif event.piece == Piece.BPAWN:
-            physical_state.set_piece_at(square, chess.Piece(chess.PAWN, chess.BLACK))
-        elif event.piece == Piece.BROOK:
-            physical_state.set_piece_at(square, chess.Piece(chess.ROOK, chess.BLACK))
-        elif event.piece == Piece.BKNIGHT:
-            physical_state.set_piece_at(square, chess.Piece(chess.KNIGHT, chess.BLACK))
-        elif event.piece == Piece.BBISHOP:
-            physical_state.set_piece_at(square, chess.Piece(chess.BISHOP, chess.BLACK))
-        elif event.piece == Piece.BKING:
-            physical_state.set_piece_at(square, chess.Piece(chess.KING, chess.BLACK))
-        elif event.piece == Piece.BQUEEN:
-            physical_state.set_piece_at(square, chess.Piece(chess.QUEEN, chess.BLACK))
-        else:
-            pass
+    def elapsed(self):
+        end = self.end_time if self.end_time is not None else time.monotonic()
+        return end - self.start_time
 
-        physical_fen = fen_from_board(physical_state)
-        if physical_fen in legal_moves:
-            move = legal_moves[physical_fen]
-            game.push_uci(move)
-            legal_moves = legal_fens(game)
+    def throughput(self):
+        elapsed = self.elapsed()
+        return self.bytes_received / elapsed if elapsed > 0 else 0.0
 
-        move_index += 1
-    return game
+    def got_ee_moves(self, data):
+        # The rest of a message whose beginning was already streamed.
+        self.decode(data[self.streamed:])
+        self.streamed = 0
+        self.decoder = EEMoves.Decoder()
+        return None
+
+    def decode(self, data):
+        for event in self.decoder.feed(data):
+            EEMoves.visitEvent(event, self)
+
+    def fieldUpdate(self, event):
+        self.received.append(FieldEvent(event.role, event.square))
+
+    def clockUpdate(self, event):
+        seconds = int(event.time.total_seconds())
+        self.received.append(ClockEvent(event.isLeft, seconds // 3600, seconds // 60 % 60, seconds % 60))
+
+    def powerup(self):
+        self.simple_event(Event.EE_POWERUP)
+
+    def eof(self):
+        self.finished = True
+        self.simple_event(Event.EE_EOF)
+
+    def fourRows(self):
+        self.simple_event(Event.EE_FOURROWS)
+
+    def emptyBoard(self):
+        self.simple_event(Event.EE_EMPTYBOARD)
+
+    def downloaded(self):
+        self.simple_event(Event.EE_DOWNLOADED)
+
+    def initialPosition(self, rotated):
+        self.simple_event(Event.EE_BEGINPOS_ROT if rotated else Event.EE_BEGINPOS)
+
+    def startTag(self):
+        self.simple_event(Event.EE_START_TAG)
+
+    def watchdogAction(self):
+        self.simple_event(Event.EE_WATCHDOG_ACTION)
+
+    def future1(self):
+        self.simple_event(Event.EE_FUTURE_1)
+
+    def future2(self):
+        self.simple_event(Event.EE_FUTURE_2)
+
+    def simple_event(self, event):
+        self.received.append(SimpleEvent(event.value))
 
-def get_ee_games(events):
-    # wait for first starting position message
-    start_move_index = 0
-    games = []
+def get_ee_events(ser):
+    return list(EEDownload(ser).events())
+
+GAME_MARKERS = (Event.EE_BEGINPOS, Event.EE_BEGINPOS_ROT, Event.EE_EOF)
+
+def is_game_marker(event):
+    return type(event) is SimpleEvent and event.type in GAME_MARKERS
+
+def ee_game_segments(events):
+    """
+    Split EEPROM events into the events of each game in a single pass. A game
+    starts after EE_BEGINPOS or EE_BEGINPOS_ROT and ends at the next of those
+    markers or EE_EOF. Works on a list or on a stream of events, yielding each
+    game as soon as its end is seen.
+    """
+    game_events = None
     for event in events:
-        start_move_index += 1
-        if type(event) is not SimpleEvent or (event.type != Event.EE_BEGINPOS and event.type != Event.EE_BEGINPOS_ROT):
+        if is_game_marker(event):
+            if game_events is not None:
+                yield game_events
+            game_events = [] if event.type != Event.EE_EOF else None
+        elif game_events is not None:
+            game_events.append(event)
+    if game_events is not None:
+        yield game_events
+
+def get_ee_game(events, start_move_index):
+    game = chess.Board()
+    placement = placement_from_board(game)
+    physical_state = bytearray(placement)
+    for move_index in range(max(start_move_index, 0), len(events)):
+        event = events[move_index]
+        if is_game_marker(event):
+            break
+        if type(event) is not FieldEvent or event.role > DgtConstants.BQUEEN:
             continue
 
-        games.append(get_ee_game(events, start_move_index))
-    return games
+        physical_state[event.square] = event.role
+        move = recognize_move(game, placement, physical_state)
+        if move is not None:
+            game.push(move)
+            placement = bytes(physical_state)
+    return game
+
+# Below this many events a process pool costs more to start than it saves.
+PARALLEL_MIN_EVENTS = 5000
+
+def reconstruct_ee_games(segments, workers=1):
+    """
+    Yield the game for each event segment, in order. With more than one
+    worker, games are reconstructed in a process pool once PARALLEL_MIN_EVENTS
+    events have been seen; smaller dumps stay in-process.
+    """
+    pending = collections.deque()
+    executor = None
+    event_count = 0
+    try:
+        for game_events in segments:
+            event_count += len(game_events)
+            if executor is None and workers > 1 and event_count >= PARALLEL_MIN_EVENTS:
+                executor = concurrent.futures.ProcessPoolExecutor(workers)
+            if executor is None:
+                yield get_ee_game(game_events, 0)
+                continue
+            pending.append(executor.submit(get_ee_game, game_events, 0))
+            while pending and pending[0].done():
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+def get_ee_games(events, workers=1):
+    return list(reconstruct_ee_games(ee_game_segments(events), workers))
 
 ranks_black = ['1', '2', '3', '4', '5', '6', '7', '8']
 files_white = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
@@ -342,6 +989,8 @@ ranks_white = ranks_black[::-1]
 files_black = files_white[::-1]
 
 def make_uci_move(driver, move, is_white):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver import ActionChains
     if len(move) != 4 and len(move) != 5:
         raise ValueError("invalid uci move")
     
@@ -429,6 +1078,7 @@ class AutoScreen:
     
     
     def make_uci_move(self, move, is_white):
+        import pyautogui
         if len(move) != 4 and len(move) != 5:
             raise ValueError("invalid uci move")
         